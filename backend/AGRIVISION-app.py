@@ -1,13 +1,23 @@
 import asyncio
 import websockets
 from yolo_processing import handler as yolo_handler
+from ws_protocol import server_extensions
+from inference_scheduler import SCHEDULER
+from parquet_archive import COMPACTOR
 
 
 async def main():
     try:
         
-        async with websockets.serve(yolo_handler, "localhost", 8000):
+        # JSON/base64 clients keep permessage-deflate; binary (JPEG) frames skip it
+        async with websockets.serve(
+            yolo_handler, "localhost", 8000, compression=None, extensions=server_extensions()
+        ):
             print("WebSocket server started on ws://localhost:8000")
+            # Server-driven analysis of the cameras listed in Data.json -> "Scheduler"
+            SCHEDULER.start()
+            # Rolls finished days from the observation store into the Parquet archive
+            COMPACTOR.start()
             await asyncio.Future()  # Run forever
     except Exception as e:
         print(f"[ERROR] WebSocket server crashed: {e}")
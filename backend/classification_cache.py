@@ -0,0 +1,163 @@
+# classification_cache.py
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from model_manager import MODELS
+from runtime_config import get_section
+
+CLASSIFICATION_CACHE_KEY = "Classification Cache"
+
+_DEFAULTS = {
+    "enabled": True,
+    "max_entries": 2048,
+    "max_distance": 4,   # Hamming distance (of 64 bits) still treated as the same crop
+}
+
+CLASSIFIERS = ("Growth", "Health", "Disease")
+
+_Key = Tuple[int, tuple]   # (crop hash, classifier versions)
+
+
+def _settings() -> dict:
+    return get_section(CLASSIFICATION_CACHE_KEY, _DEFAULTS)
+
+
+def dhash(image: np.ndarray) -> int:
+    """64-bit difference hash of an RGB/BGR or grey image."""
+    grey = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(grey, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _block_ranges(count: int) -> List[Tuple[int, int]]:
+    """(shift, mask) of `count` contiguous, nearly equal slices of 64 bits."""
+    ranges, shift = [], 0
+    for i in range(count):
+        width = 64 // count + (1 if i < 64 % count else 0)
+        ranges.append((shift, (1 << width) - 1))
+        shift += width
+    return ranges
+
+
+class ClassificationCache:
+    """
+    LRU of classifier outputs keyed by the perceptual hash of the 224x224
+    crop and the versions of the classification models that produced them.
+    Near-identical crops from a static camera skip the classifiers entirely.
+
+    Near matches are found without scanning every entry: the 64-bit hash is
+    split into max_distance + 1 blocks, and two hashes within max_distance
+    bits must agree exactly on at least one block (pigeonhole), so only the
+    entries sharing a block are compared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[_Key, dict]" = OrderedDict()
+        self._index: Dict[Tuple[int, int], Set[_Key]] = defaultdict(set)   # (block, value) -> keys
+        self._ranges: List[Tuple[int, int]] = []
+        self._hits = 0
+        self._misses = 0
+        MODELS.add_swap_listener(self._on_model_swap)
+
+    @staticmethod
+    def model_versions(snapshot: Dict[str, tuple]) -> tuple:
+        """Version part of the cache key, from a MODELS.snapshot() of CLASSIFIERS."""
+        return tuple(snapshot[key][2] for key in CLASSIFIERS)
+
+    def _blocks(self, crop_hash: int):
+        return [(i, (crop_hash >> shift) & mask) for i, (shift, mask) in enumerate(self._ranges)]
+
+    def _reindex(self, max_distance: int) -> None:
+        ranges = _block_ranges(min(64, max(1, max_distance + 1)))
+        if ranges == self._ranges:
+            return
+        self._ranges = ranges
+        self._index.clear()
+        for key in self._entries:
+            for block in self._blocks(key[0]):
+                self._index[block].add(key)
+
+    def _unindex(self, key: _Key) -> None:
+        for block in self._blocks(key[0]):
+            bucket = self._index.get(block)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._index[block]
+
+    def get(self, crop_hash: int, versions: tuple) -> Optional[dict]:
+        cfg = _settings()
+        if not cfg.get("enabled"):
+            return None
+        max_distance = int(cfg["max_distance"])
+
+        with self._lock:
+            key = (crop_hash, versions)
+            found = key if key in self._entries else None
+            if found is None and max_distance > 0:
+                self._reindex(max_distance)
+                best = max_distance + 1
+                for block in self._blocks(crop_hash):
+                    for entry_key in self._index.get(block, ()):
+                        if entry_key[1] != versions:
+                            continue
+                        distance = _hamming(entry_key[0], crop_hash)
+                        if distance < best:
+                            found, best = entry_key, distance
+
+            if found is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(found)
+            self._hits += 1
+            return self._entries[found]
+
+    def put(self, crop_hash: int, versions: tuple, classification: dict) -> None:
+        cfg = _settings()
+        if not cfg.get("enabled") or "error" in classification:
+            return
+        max_entries = max(1, int(cfg["max_entries"]))
+        with self._lock:
+            self._reindex(int(cfg["max_distance"]))
+            key = (crop_hash, versions)
+            if key not in self._entries:
+                for block in self._blocks(crop_hash):
+                    self._index[block].add(key)
+            self._entries[key] = classification
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def _on_model_swap(self, key: str, version: int) -> None:
+        if key in CLASSIFIERS:
+            self.clear()
+            print(f"[CLASSIFY CACHE] {key} model v{version} swapped in, cache cleared")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+CLASSIFICATION_CACHE = ClassificationCache()
@@ -0,0 +1,132 @@
+# dataframe_cache.py
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FileKey = Tuple[int, int]   # (mtime_ns, size)
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """Same data with every column backed by its own read-only array."""
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy(copy=True)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+class _Entry:
+    __slots__ = ("key", "df", "loading", "error")
+
+    def __init__(self):
+        self.key: Optional[Hashable] = None   # version the cached frame belongs to
+        self.df: Optional[pd.DataFrame] = None
+        self.loading: Optional[threading.Event] = None
+        self.error: Optional[BaseException] = None
+
+
+class DataFrameCache:
+    """
+    Process-wide cache of parsed files, keyed by path and validated by
+    (mtime, size) on every call; get_versioned() does the same for data that
+    is not a single file, with a caller-supplied version.
+
+    Concurrent callers that miss share one load (single flight). Callers
+    get a shallow view of the cached frame: adding columns to it is local
+    to the request, and writing into the cached data raises. The least
+    recently used entries beyond `max_entries` are dropped.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._loads = 0
+
+    def get(self, path: Path, loader: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+        stat = os.stat(path)
+        file_key: FileKey = (stat.st_mtime_ns, stat.st_size)
+        return self._get(os.path.abspath(path), file_key, lambda: loader(path))
+
+    def get_versioned(self, name: Hashable, version: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached loader() under `name`, reloaded whenever `version` changes."""
+        return self._get(name, version, loader)
+
+    def _get(self, name: Hashable, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        while True:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is None:
+                    entry = self._entries[name] = _Entry()
+                    self._evict()
+                self._entries.move_to_end(name)
+                if entry.key == key and entry.df is not None:
+                    self._hits += 1
+                    return entry.df.copy(deep=False)
+                if entry.loading is None:
+                    # This caller loads; everyone else waits for it
+                    self._misses += 1
+                    entry.loading = threading.Event()
+                    loading = entry.loading
+                    break
+                self._waits += 1
+                loading = entry.loading
+            loading.wait()
+            with self._lock:
+                if entry.error is not None and entry.key != key:
+                    raise entry.error
+
+        try:
+            df = _freeze(loader())
+        except BaseException as e:
+            with self._lock:
+                entry.error = e
+                entry.loading = None
+            loading.set()
+            raise
+
+        with self._lock:
+            entry.key, entry.df, entry.error = key, df, None
+            entry.loading = None
+            self._loads += 1
+        loading.set()
+        return df.copy(deep=False)
+
+    def _evict(self) -> None:
+        for name in list(self._entries):
+            if len(self._entries) <= self._max_entries:
+                return
+            if self._entries[name].loading is None:
+                del self._entries[name]
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": sum(1 for e in self._entries.values() if e.df is not None),
+                "hits": self._hits,
+                "misses": self._misses,
+                "waits": self._waits,
+                "loads": self._loads,
+                "hit_rate": self._hits / total if total else 0.0,
+            }
+
+
+DF_CACHE = DataFrameCache()
@@ -0,0 +1,96 @@
+# detection_roi.py
+import math
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from runtime_config import get_section
+
+DETECTION_ROI_KEY = "Detection ROI"
+
+# Coordinates are fractions of the frame size (0..1) so they survive
+# resolution changes, e.g.
+#   "cameras": {
+#       "camera1": {"rect": [0.1, 0.2, 0.9, 1.0]},
+#       "camera2": {"polygon": [[0.0, 0.3], [1.0, 0.25], [1.0, 1.0], [0.0, 1.0]]}
+#   }
+_DEFAULTS = {
+    "cameras": {},
+    "imgsz": 640,       # detector input size for the full frame
+    "min_imgsz": 320,   # smallest input size used for a small ROI
+}
+
+
+class Region:
+    """Where one camera's detector input comes from within the full frame."""
+
+    def __init__(self, x1: int, y1: int, x2: int, y2: int, imgsz: int, polygon: Optional[np.ndarray] = None):
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+        self.imgsz = imgsz
+        self.polygon = polygon   # full-frame pixel coordinates, or None for a rectangle
+
+    def source(self, frame: np.ndarray) -> np.ndarray:
+        """The cropped (and for polygons, masked) detector input."""
+        crop = frame[self.y1:self.y2, self.x1:self.x2]
+        if self.polygon is None:
+            return crop
+        mask = np.zeros(crop.shape[:2], dtype=np.uint8)
+        cv2.fillPoly(mask, [self.polygon - np.array([self.x1, self.y1], dtype=np.int32)], 255)
+        return cv2.bitwise_and(crop, crop, mask=mask)
+
+    def to_frame(self, x1: int, y1: int, x2: int, y2: int) -> Tuple[int, int, int, int]:
+        return x1 + self.x1, y1 + self.y1, x2 + self.x1, y2 + self.y1
+
+    def contains(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Whether a full-frame box's centre lies inside the ROI."""
+        if self.polygon is None:
+            return True
+        centre = ((x1 + x2) / 2.0, (y1 + y2) / 2.0)
+        return cv2.pointPolygonTest(self.polygon, centre, False) >= 0
+
+
+def _scaled_points(points: List[List[float]], width: int, height: int) -> np.ndarray:
+    return np.array(
+        [[int(round(min(max(float(x), 0.0), 1.0) * width)), int(round(min(max(float(y), 0.0), 1.0) * height))]
+         for x, y in points],
+        dtype=np.int32,
+    )
+
+
+def region_for(camera: str, frame_shape) -> Region:
+    """The configured ROI of `camera`, or the whole frame."""
+    cfg = get_section(DETECTION_ROI_KEY, _DEFAULTS)
+    height, width = frame_shape[:2]
+    full_imgsz = int(cfg["imgsz"])
+    roi = (cfg.get("cameras") or {}).get(camera)
+
+    polygon = None
+    try:
+        if roi and roi.get("polygon"):
+            polygon = _scaled_points(roi["polygon"], width, height)
+            x1, y1 = polygon.min(axis=0)
+            x2, y2 = polygon.max(axis=0)
+        elif roi and roi.get("rect"):
+            (x1, y1), (x2, y2) = _scaled_points(
+                [roi["rect"][:2], roi["rect"][2:4]], width, height
+            )
+        else:
+            return Region(0, 0, width, height, full_imgsz)
+    except (TypeError, ValueError, IndexError) as e:
+        print(f"[ROI] Ignoring invalid ROI for {camera}: {e}")
+        return Region(0, 0, width, height, full_imgsz)
+
+    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+    if x2 - x1 < 32 or y2 - y1 < 32:
+        print(f"[ROI] ROI for {camera} is too small, using the full frame")
+        return Region(0, 0, width, height, full_imgsz)
+
+    # Ultralytics letterboxes the long side to imgsz, so pixels-per-plant
+    # stays the same when imgsz scales with the ROI's long side relative
+    # to the frame's long side.
+    scale = max(x2 - x1, y2 - y1) / max(width, height)
+    imgsz = int(math.ceil(full_imgsz * scale / 32.0)) * 32
+    imgsz = min(full_imgsz, max(int(cfg["min_imgsz"]), imgsz))
+
+    return Region(x1, y1, x2, y2, imgsz, polygon)
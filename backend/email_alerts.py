@@ -62,11 +62,14 @@ def send_disease_alert_email(
     camera_number: str,
     plant_id: str,
     classification: dict,
-    image_bgr: np.ndarray,
+    image_bgr: Optional[np.ndarray] = None,
+    image_jpeg: Optional[bytes] = None,
 ) -> bool:
     """
     Sends disease alert email (max 1 per camera per 1 hour).
     Attaches the cropped image directly.
+    Pass `image_jpeg` to reuse bytes that were already encoded;
+    `image_bgr` is only encoded when no JPEG is given.
 
     Uses SMTP creds from env vars:
       AGRIVISION_SMTP_USER
@@ -96,11 +99,16 @@ def send_disease_alert_email(
     growth = str(classification.get("growth", "Unknown"))
     health = str(classification.get("health", "Unknown"))
 
-    # Encode image to jpg bytes
-    ok, buffer = cv2.imencode(".jpg", image_bgr)
-    if not ok:
-        print("[ALERT] Failed to encode image for email")
-        return False
+    # Encode image to jpg bytes (only if the caller didn't already)
+    if image_jpeg is None:
+        if image_bgr is None:
+            print("[ALERT] No image given for email")
+            return False
+        ok, buffer = cv2.imencode(".jpg", image_bgr)
+        if not ok:
+            print("[ALERT] Failed to encode image for email")
+            return False
+        image_jpeg = buffer.tobytes()
 
     msg = EmailMessage()
     msg["Subject"] = f"[AgriVision Alert] Disease detected - Camera {camera_number}"
@@ -118,7 +126,7 @@ def send_disease_alert_email(
     )
 
     msg.add_attachment(
-        buffer.tobytes(),
+        image_jpeg,
         maintype="image",
         subtype="jpeg",
         filename=f"{plant_id}.jpg",
@@ -0,0 +1,61 @@
+# encoded_image.py
+import base64
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from runtime_config import get_section
+
+IMAGE_ENCODING_KEY = "Image Encoding"
+
+_DEFAULTS = {
+    "jpeg_quality": 95,   # same as cv2's default
+}
+
+
+def jpeg_quality() -> int:
+    try:
+        return min(100, max(1, int(get_section(IMAGE_ENCODING_KEY, _DEFAULTS)["jpeg_quality"])))
+    except (TypeError, ValueError):
+        return _DEFAULTS["jpeg_quality"]
+
+
+class EncodedCrop:
+    """
+    A BGR image that is JPEG-compressed at most once.
+    The same bytes are shared by the disk writer, the websocket payload
+    and the alert email attachment.
+    """
+
+    def __init__(self, image: np.ndarray, quality: Optional[int] = None):
+        self.image = image
+        self.quality = quality if quality is not None else jpeg_quality()
+        self._lock = threading.Lock()
+        self._jpeg: Optional[bytes] = None
+        self._base64: Optional[str] = None
+
+    @property
+    def jpeg(self) -> bytes:
+        if self._jpeg is None:
+            with self._lock:
+                if self._jpeg is None:
+                    ok, buffer = cv2.imencode(
+                        ".jpg", self.image, [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+                    )
+                    if not ok:
+                        raise Exception("Failed to JPEG-encode image")
+                    self._jpeg = buffer.tobytes()
+        return self._jpeg
+
+    @property
+    def base64(self) -> str:
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.jpeg).decode("utf-8")
+        return self._base64
+
+
+def as_encoded(image) -> EncodedCrop:
+    """Accepts either a BGR array or an EncodedCrop."""
+    return image if isinstance(image, EncodedCrop) else EncodedCrop(image)
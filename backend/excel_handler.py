@@ -1,6 +1,19 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pathlib import Path
+from datetime import date
+from typing import Literal
+import csv
+import io
+import os
+import tempfile
 import pandas as pd
+from openpyxl import Workbook
+
+import observation_store
+import parquet_archive
+from dataframe_cache import DF_CACHE
 
 router = APIRouter()
 
@@ -19,15 +32,21 @@ COLS = [
 ]
 
 def load_df() -> pd.DataFrame:
-    print("[load_df] Called")
-    print(f"[load_df] Excel path: {EXCEL_PATH}")
-
+    """
+    The parsed workbook, shared across requests until the file's mtime or
+    size changes. Returns a read-only view: filter or add columns freely,
+    but do not write into existing columns.
+    """
     if not EXCEL_PATH.exists():
         print("[load_df] ❌ Excel NOT FOUND")
         raise HTTPException(status_code=404, detail=f"Excel not found: {EXCEL_PATH}")
 
-    print("[load_df] ✅ Excel found, loading...")
-    df = pd.read_excel(EXCEL_PATH, header=None)
+    return DF_CACHE.get(EXCEL_PATH, _read_df)
+
+
+def _read_df(path: Path) -> pd.DataFrame:
+    print(f"[load_df] Parsing {path}")
+    df = pd.read_excel(path, header=None)
     print(f"[load_df] Raw shape: {df.shape}")
 
     if df.shape[1] < len(COLS):
@@ -60,34 +79,76 @@ def load_df() -> pd.DataFrame:
     return df
 
 
-@router.get("/agrivision/summary")
-def agrivision_summary(
-    days: int = Query(30, ge=1, le=365),
-    camera_id: int | None = Query(None, ge=1, le=100),
-    day: str | None = Query(None, description="Optional YYYY-MM-DD"),
-):
-    print("\n[agrivision_summary] Endpoint called")
-    print(f"[agrivision_summary] days={days}, camera_id={camera_id}, day={day}")
+# Observation store column -> load_df column
+_STORE_TO_DF = {
+    "date": "date",
+    "time": "time",
+    "camera_number": "camera_id",
+    "plant_id": "plant_id",
+    "growth": "score",
+    "health": "nutrition_label",
+    "disease": "disease_label",
+    "disease_status": "disease_flag",
+    "health_status": "nutrition_ok",
+}
+_DF_TO_STORE = {v: k for k, v in _STORE_TO_DF.items()}
+
+
+def load_filtered(
+    days: int,
+    camera_id: int | None,
+    day: str | None = None,
+    columns: tuple = ("nutrition_label", "disease_label"),
+) -> pd.DataFrame:
+    """
+    Rows for the /agrivision endpoints with the camera and day filters applied.
+    Reads only the needed day/camera partitions and columns of the Parquet
+    archive when it is available, otherwise filters the whole workbook.
+    """
+    if parquet_archive.available():
+        df = parquet_archive.query_frame(
+            days=days,
+            camera=f"camera{camera_id}" if camera_id is not None else None,
+            day=day,
+            columns=[_DF_TO_STORE[c] for c in columns],
+        ).rename(columns=_STORE_TO_DF)
+        for c in ("nutrition_label", "disease_label"):
+            if c in df.columns:
+                df[c] = df[c].astype(str)
+        print(f"[load_filtered] Archive query: {len(df)} rows")
+        return df
 
     df = load_df()
-    print(f"[agrivision_summary] Loaded rows: {len(df)}")
-
-    # Filter by camera if needed
     if camera_id is not None:
-        before = len(df)
         df = df[df["camera_id"] == camera_id].copy()
-        print(f"[agrivision_summary] Camera filter: {before} → {len(df)}")
-
-    # Filter by day OR last N days
     if day is not None:
-        before = len(df)
         df = df[df["day"] == day].copy()
-        print(f"[agrivision_summary] Day filter ({day}): {before} → {len(df)}")
     else:
         max_ts = df["timestamp"].max()
         start = max_ts - pd.Timedelta(days=days)
         df = df[df["timestamp"] >= start].copy()
-        print(f"[agrivision_summary] Last {days} days filter → {len(df)} rows")
+    print(f"[load_filtered] Workbook query: {len(df)} rows")
+    return df
+
+
+@router.get("/agrivision/cache")
+def agrivision_cache_stats():
+    """Hit/miss counters of the shared DataFrame cache (workbook and archive reads)."""
+    return DF_CACHE.stats()
+
+
+@router.get("/agrivision/summary")
+def agrivision_summary(
+    days: int = Query(30, ge=1, le=365),
+    camera_id: int | None = Query(None, ge=1, le=100),
+    day: str | None = Query(None, description="Optional YYYY-MM-DD"),
+):
+    print("\n[agrivision_summary] Endpoint called")
+    print(f"[agrivision_summary] days={days}, camera_id={camera_id}, day={day}")
+
+    # Filter by camera and by day OR last N days
+    df = load_filtered(days, camera_id, day)
+    print(f"[agrivision_summary] Filtered rows: {len(df)}")
 
     if df.empty:
         print("[agrivision_summary] ⚠️ No data after filtering")
@@ -138,17 +199,10 @@ def agrivision_health_timeline(
     """
     Returns daily health rate (%) based on disease_label:
     healthy_pct = (# healthy rows / total rows) * 100 per day
-    Uses the SAME Excel file as /agrivision/summary (agrivision_data.xlsx).
+    Uses the SAME data as /agrivision/summary (load_filtered).
     """
-    df = load_df()
-
-    if camera_id is not None:
-        df = df[df["camera_id"] == camera_id].copy()
-
     # Last N days based on max timestamp (same logic as summary)
-    max_ts = df["timestamp"].max()
-    start = max_ts - pd.Timedelta(days=days)
-    df = df[df["timestamp"] >= start].copy()
+    df = load_filtered(days, camera_id, columns=("disease_label",))
 
     if df.empty:
         return {"points": []}
@@ -177,16 +231,9 @@ def agrivision_disease_timeline(
     """
     Returns daily disease rate (%) based on disease_label:
     disease_pct = 100 - healthy_pct
-    Uses the SAME Excel file as /agrivision/summary (agrivision_data.xlsx).
+    Uses the SAME data as /agrivision/summary (load_filtered).
     """
-    df = load_df()
-
-    if camera_id is not None:
-        df = df[df["camera_id"] == camera_id].copy()
-
-    max_ts = df["timestamp"].max()
-    start = max_ts - pd.Timedelta(days=days)
-    df = df[df["timestamp"] >= start].copy()
+    df = load_filtered(days, camera_id, columns=("disease_label",))
 
     if df.empty:
         return {"points": []}
@@ -218,14 +265,7 @@ def agrivision_growth_timeline(
     Returns:
       fully_nutritional, k_deficient, n_deficient, p_deficient
     """
-    df = load_df()
-
-    if camera_id is not None:
-        df = df[df["camera_id"] == camera_id].copy()
-
-    max_ts = df["timestamp"].max()
-    start = max_ts - pd.Timedelta(days=days)
-    df = df[df["timestamp"] >= start].copy()
+    df = load_filtered(days, camera_id, columns=("nutrition_label",))
 
     if df.empty:
         return {"points": []}
@@ -259,3 +299,81 @@ def agrivision_growth_timeline(
         })
 
     return {"points": points}
+
+
+# -------------------------
+# Export (from the observation store)
+# -------------------------
+EXPORT_CHUNK_ROWS = 5000
+
+
+def _parse_day(value: str | None, name: str) -> str | None:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be YYYY-MM-DD, got {value!r}")
+
+
+def _csv_chunks(start: str | None, end: str | None, camera: str | None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(observation_store.COLUMNS)
+    yield buffer.getvalue()
+
+    for chunk in observation_store.iter_chunks(start, end, camera, chunk_size=EXPORT_CHUNK_ROWS):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def _write_xlsx(start: str | None, end: str | None, camera: str | None) -> str:
+    # Write-only workbooks stream rows to a temp file, so memory stays flat
+    fd, tmp_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("agrivision")
+    ws.append(observation_store.COLUMNS)
+    for chunk in observation_store.iter_chunks(start, end, camera, chunk_size=EXPORT_CHUNK_ROWS):
+        for row in chunk:
+            ws.append(["" if v is None else v for v in row])
+    wb.save(tmp_path)
+    return tmp_path
+
+
+@router.get("/agrivision/export")
+def agrivision_export(
+    format: Literal["xlsx", "csv"] = Query("xlsx"),
+    start: str | None = Query(None, description="First day, YYYY-MM-DD"),
+    end: str | None = Query(None, description="Last day, YYYY-MM-DD"),
+    camera_id: int | None = Query(None, ge=1, le=100),
+):
+    """
+    Spreadsheet of the recorded observations, read from the observation
+    store in chunks. CSV is streamed as it is produced; XLSX is built in
+    write-only mode in a temp file and streamed from disk.
+    """
+    start = _parse_day(start, "start")
+    end = _parse_day(end, "end")
+    camera = f"camera{camera_id}" if camera_id is not None else None
+
+    parts = ["agrivision", camera or "all", start or "begin", end or "today"]
+    filename = "_".join(parts) + f".{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format == "csv":
+        return StreamingResponse(
+            _csv_chunks(start, end, camera),
+            media_type="text/csv",
+            headers=headers,
+        )
+
+    tmp_path = _write_xlsx(start, end, camera)
+    return FileResponse(
+        tmp_path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers=headers,
+        background=BackgroundTask(os.remove, tmp_path),
+    )
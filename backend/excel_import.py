@@ -0,0 +1,397 @@
+# excel_import.py
+"""
+Bulk import of the historical workbooks into the observation store, so no
+request path has to parse Excel again.
+
+    agrivision_data.xlsx          -> observations (same table the live pipeline appends to)
+    Excel_Data.xlsx DetectionData -> detection_history + detection_percentages
+    Excel_Data.xlsx SensorData    -> sensor_history
+
+Workbooks are streamed with openpyxl's read-only iterators. Every sheet
+column becomes a real table column (added as new headers appear), so
+readers select only the columns and time range they need. The "(%)"
+strings ("early growth: 40%, leafy growth: 60%") are parsed once here,
+with labels normalized to ClassificationMapper codes. Every batch commits
+with its checkpoint, so rerunning resumes where the last run stopped;
+sheets are assumed to be appended to, not edited in place.
+
+Run from the repo root:
+    python backend/excel_import.py
+    python backend/excel_import.py --excel-data path/to/Excel_Data.xlsx --skip-agrivision
+"""
+import argparse
+import re
+import sqlite3
+from datetime import date, datetime, time as dtime
+from pathlib import Path
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+from openpyxl import load_workbook
+
+import observation_store
+from classification_codes import DISEASE_CODES
+from classification_mapper import ClassificationMapper
+from observation_store import checkpoint_key, get_meta, set_meta
+from runtime_config import EXCEL_FILE
+
+DETECTION_SHEET = "DetectionData"
+SENSOR_SHEET = "SensorData"
+
+# Percentage-string columns of DetectionData and what they classify
+PERCENT_COLUMNS = {
+    "GROWTH_STAGE (%)": "growth",
+    "HEALTH_STATUS (%)": "health",
+    "DISEASE_STATUS (%)": "disease",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detection_history (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_row  INTEGER NOT NULL,
+    timestamp   TEXT NOT NULL,
+    camera_id   TEXT                   -- CAMERA_ID; other columns are added as "col:<header>"
+);
+CREATE INDEX IF NOT EXISTS idx_detection_history_ts ON detection_history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_detection_history_camera_ts ON detection_history (camera_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS detection_percentages (
+    detection_id INTEGER NOT NULL REFERENCES detection_history (id),
+    kind         TEXT NOT NULL,        -- growth / health / disease
+    label        TEXT NOT NULL,        -- as written in the sheet, lowercased
+    code         TEXT NOT NULL,        -- ClassificationMapper code
+    pct          REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_detection_percentages_detection ON detection_percentages (detection_id);
+CREATE INDEX IF NOT EXISTS idx_detection_percentages_kind_code ON detection_percentages (kind, code);
+
+CREATE TABLE IF NOT EXISTS sensor_history (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_row  INTEGER NOT NULL,
+    timestamp   TEXT NOT NULL          -- other columns are added as "col:<header>"
+);
+CREATE INDEX IF NOT EXISTS idx_sensor_history_ts ON sensor_history (timestamp);
+"""
+
+_TABLES = {DETECTION_SHEET: "detection_history", SENSOR_SHEET: "sensor_history"}
+
+# Sheet headers are stored as "col:<header>" so they cannot clash with the
+# fixed columns (SQLite column names are case-insensitive)
+_COLUMN_PREFIX = "col:"
+
+_PERCENT_RE = re.compile(r'([^:,]+):\s*(\d+(?:\.\d+)?)%')
+
+# DISEASE_CODES keys are mixed case while the mapper lowercases its input
+_DISEASE_CODES_CI = {k.lower(): v for k, v in DISEASE_CODES.items()}
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sheet_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Sheet headers that have a column in `table`, in table order."""
+    return [
+        row[1][len(_COLUMN_PREFIX):]
+        for row in conn.execute(f"PRAGMA table_info({table})")
+        if row[1].startswith(_COLUMN_PREFIX)
+    ]
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    # Imports from before the per-column layout kept rows as a JSON blob; redo them
+    for sheet, table in _TABLES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if "fields" in columns:
+            print(f"[IMPORT] {table} uses the old JSON layout, it will be re-imported")
+            with conn:
+                if table == "detection_history":
+                    conn.execute("DROP TABLE IF EXISTS detection_percentages")
+                conn.execute(f"DROP TABLE {table}")
+                conn.execute(
+                    "DELETE FROM meta WHERE key LIKE ? OR key LIKE ?", (f"import:%:{sheet}", f"source:%:{sheet}")
+                )
+    conn.executescript(_SCHEMA)
+
+
+def _add_columns(conn: sqlite3.Connection, table: str, headers: Sequence[str]) -> None:
+    existing = set(_sheet_columns(conn, table))
+    for header in headers:
+        if header not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(_COLUMN_PREFIX + header)}")
+            existing.add(header)
+
+
+def parse_percentages(percentage_str) -> Dict[str, float]:
+    """'early growth: 40%, leafy growth: 60%' -> {'early growth': 40.0, 'leafy growth': 60.0}"""
+    result = {}
+    if isinstance(percentage_str, str):
+        for label, value in _PERCENT_RE.findall(percentage_str):
+            result[label.strip().lower()] = float(value)
+    return result
+
+
+def label_code(kind: str, label: str) -> str:
+    key = label.strip().lower().replace(" ", "_")
+    if kind == "growth":
+        return ClassificationMapper.get_growth_code(key)
+    if kind == "health":
+        return ClassificationMapper.get_health_code(key)
+    return _DISEASE_CODES_CI.get(key, ClassificationMapper.UNKNOWN_DISEASE)
+
+
+def _cell(value):
+    if isinstance(value, (datetime, date, dtime)):
+        return value.isoformat()
+    return value
+
+
+def _timestamp(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    parsed = pd.to_datetime(str(value), errors="coerce")
+    return None if pd.isna(parsed) else parsed.isoformat(sep=" ")
+
+
+# -------------------------
+# Import
+# -------------------------
+def _value_headers(sheet: str, header: Sequence[str]) -> List[str]:
+    """Headers stored as "col:<header>" columns (the rest have fixed columns or tables)."""
+    fixed = {"TIMESTAMP"} if sheet == SENSOR_SHEET else {"TIMESTAMP", "CAMERA_ID", *PERCENT_COLUMNS}
+    return [h for h in header if h and h not in fixed]
+
+
+def import_sheet(conn: sqlite3.Connection, workbook: Path, sheet: str, batch_rows: int = 1000) -> int:
+    """
+    Streams one Excel_Data.xlsx sheet into its history table, resuming
+    from the sheet's checkpoint. Returns the number of rows imported.
+    """
+    ensure_schema(conn)
+    key = checkpoint_key(workbook, sheet)
+    done_row = int(get_meta(conn, key) or 1)
+
+    wb = load_workbook(workbook, read_only=True, data_only=True)
+    try:
+        if sheet not in wb.sheetnames:
+            print(f"[IMPORT] {workbook} has no sheet {sheet!r}, skipping")
+            return 0
+        ws = wb[sheet]
+        header = [str(h).strip() if h is not None else "" for h in next(ws.iter_rows(max_row=1, values_only=True), ())]
+        if "TIMESTAMP" not in header:
+            print(f"[IMPORT] {sheet} has no TIMESTAMP column, skipping")
+            return 0
+
+        table = _TABLES[sheet]
+        values = _value_headers(sheet, header)
+        with conn:
+            _add_columns(conn, table, values)
+        fixed = ["source_row", "timestamp"] + (["camera_id"] if sheet == DETECTION_SHEET else [])
+        insert = (
+            f"INSERT INTO {table} ({', '.join(fixed + [_quote(_COLUMN_PREFIX + h) for h in values])}) "
+            f"VALUES ({', '.join('?' for _ in fixed + values)})"
+        )
+
+        imported = 0
+        batch: List[tuple] = []
+        last_row = done_row
+
+        def commit():
+            with conn:
+                for source_row, record in batch:
+                    _insert_record(conn, sheet, insert, values, source_row, record)
+                set_meta(conn, key, str(last_row))
+
+        for last_row, row in enumerate(
+            ws.iter_rows(min_row=done_row + 1, values_only=True), start=done_row + 1
+        ):
+            record = {name: _cell(value) for name, value in zip(header, row) if name}
+            if _timestamp(record.get("TIMESTAMP")) is None:
+                continue
+            batch.append((last_row, record))
+            if len(batch) >= batch_rows:
+                commit()
+                imported += len(batch)
+                batch.clear()
+
+        commit()
+        imported += len(batch)
+        return imported
+    finally:
+        wb.close()
+
+
+def _insert_record(
+    conn: sqlite3.Connection, sheet: str, insert: str, values: List[str], source_row: int, record: dict
+) -> None:
+    row = [source_row, _timestamp(record.get("TIMESTAMP"))]
+    if sheet == DETECTION_SHEET:
+        camera = record.get("CAMERA_ID")
+        row.append(None if camera is None else str(camera))
+    cursor = conn.execute(insert, row + [record.get(h) for h in values])
+
+    if sheet == DETECTION_SHEET:
+        conn.executemany(
+            "INSERT INTO detection_percentages (detection_id, kind, label, code, pct) VALUES (?, ?, ?, ?, ?)",
+            [
+                (cursor.lastrowid, kind, label, label_code(kind, label), pct)
+                for col, kind in PERCENT_COLUMNS.items()
+                for label, pct in parse_percentages(record.get(col)).items()
+            ],
+        )
+
+
+_REFRESH_LOCK = threading.Lock()
+
+
+def refresh_sheet(workbook, sheet: str, path: Optional[str] = None) -> None:
+    """
+    Imports the rows appended to `sheet` since the last import, if the
+    workbook changed (mtime/size) since then. Otherwise it costs one stat
+    and one meta lookup.
+    """
+    workbook = Path(workbook)
+    try:
+        stat = workbook.stat()
+    except OSError:
+        return
+    stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+    key = f"source:{workbook.name}:{sheet}"
+
+    with _REFRESH_LOCK:
+        conn = observation_store.connect(path)
+        try:
+            if get_meta(conn, key) == stamp:
+                return
+            count = import_sheet(conn, workbook, sheet)
+            with conn:
+                set_meta(conn, key, stamp)
+            if count:
+                print(f"[IMPORT] {workbook} [{sheet}]: {count} new rows")
+        finally:
+            conn.close()
+
+
+# -------------------------
+# Reader (used by graph_fast_api)
+# -------------------------
+def load_sheet(
+    sheet: str,
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    camera: Optional[str] = None,
+    path: Optional[str] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    The imported sheet as a DataFrame shaped like pd.read_excel's, with
+    TIMESTAMP parsed and each "(%)" column already a {label: pct} dict.
+    Only `columns` (plus TIMESTAMP; default all) are read, and the time and
+    camera filters run in SQL on indexed columns.
+    None when the sheet has not been imported.
+    """
+    if sheet not in _TABLES or not observation_store.store_path(path).exists():
+        return None
+    table = _TABLES[sheet]
+
+    conn = observation_store.connect(path, readonly=True)
+    try:
+        try:
+            if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+                return None
+        except sqlite3.OperationalError:
+            return None   # never imported
+
+        stored = _sheet_columns(conn, table)
+        if columns is not None:
+            wanted = list(columns)
+        elif sheet == DETECTION_SHEET:
+            wanted = ["CAMERA_ID", *stored, *PERCENT_COLUMNS]
+        else:
+            wanted = stored
+        values = [c for c in wanted if c in stored]
+        with_camera = sheet == DETECTION_SHEET and "CAMERA_ID" in wanted
+        percent_columns = [c for c in wanted if sheet == DETECTION_SHEET and c in PERCENT_COLUMNS]
+
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("h.timestamp >= ?")
+            params.append(start.isoformat(sep=" "))
+        if end is not None:
+            clauses.append("h.timestamp <= ?")
+            params.append(end.isoformat(sep=" "))
+        if camera is not None and sheet == DETECTION_SHEET:
+            clauses.append("h.camera_id = ?")
+            params.append(str(camera))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+        select = ["h.id", "h.timestamp"] + (["h.camera_id"] if with_camera else []) + [
+            "h." + _quote(_COLUMN_PREFIX + c) for c in values
+        ]
+        rows = conn.execute(f"SELECT {', '.join(select)} FROM {table} h{where} ORDER BY h.id", params).fetchall()
+        names = ["id", "TIMESTAMP"] + (["CAMERA_ID"] if with_camera else []) + values
+        df = pd.DataFrame.from_records(rows, columns=names)
+
+        if percent_columns:
+            position = {row_id: i for i, row_id in enumerate(df["id"])}
+            parsed = {col: [{} for _ in range(len(df))] for col in percent_columns}
+            column_of = {PERCENT_COLUMNS[col]: col for col in percent_columns}
+            kinds = ", ".join("?" for _ in column_of)
+            for detection_id, kind, label, pct in conn.execute(
+                f"SELECT p.detection_id, p.kind, p.label, p.pct FROM detection_percentages p "
+                f"JOIN {table} h ON h.id = p.detection_id"
+                f"{where or ' WHERE 1'} AND p.kind IN ({kinds})",
+                [*params, *column_of],
+            ):
+                parsed[column_of[kind]][position[detection_id]][label] = pct
+            for col in percent_columns:
+                df[col] = parsed[col]
+    finally:
+        conn.close()
+
+    df = df.drop(columns=["id"])
+    df["TIMESTAMP"] = pd.to_datetime(df["TIMESTAMP"], errors="coerce")
+    return df.dropna(subset=["TIMESTAMP"])
+
+
+# -------------------------
+# CLI
+# -------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Import historical Excel workbooks into the observation store")
+    parser.add_argument("--agrivision", help="agrivision_data.xlsx (default: Data.json agrivison_data_path)")
+    parser.add_argument("--excel-data", default=EXCEL_FILE, help="Excel_Data.xlsx with DetectionData/SensorData")
+    parser.add_argument("--db", help="observation store path (default: Data.json 'Observation Store')")
+    parser.add_argument("--batch", type=int, default=1000, help="rows per committed batch")
+    parser.add_argument("--skip-agrivision", action="store_true")
+    parser.add_argument("--skip-excel-data", action="store_true")
+    args = parser.parse_args()
+
+    conn = observation_store.connect(args.db)
+    ensure_schema(conn)
+    try:
+        if not args.skip_agrivision:
+            agrivision = Path(args.agrivision) if args.agrivision else observation_store.excel_path()
+            if agrivision is not None and agrivision.exists():
+                count = observation_store.import_workbook(conn, agrivision, args.batch)
+                print(f"[IMPORT] {agrivision}: {count} observations")
+            else:
+                print(f"[IMPORT] agrivision workbook not found: {agrivision}")
+
+        if not args.skip_excel_data:
+            excel_data = Path(args.excel_data)
+            if excel_data.exists():
+                for sheet in (DETECTION_SHEET, SENSOR_SHEET):
+                    count = import_sheet(conn, excel_data, sheet, args.batch)
+                    print(f"[IMPORT] {excel_data} [{sheet}]: {count} rows")
+            else:
+                print(f"[IMPORT] Excel_Data workbook not found: {excel_data}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
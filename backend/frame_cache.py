@@ -0,0 +1,78 @@
+# frame_cache.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from runtime_config import get_section
+
+FRAME_CACHE_KEY = "Frame Cache"
+
+_DEFAULTS = {
+    "max_entries": 32,    # frames kept across all cameras
+    "ttl_seconds": 30.0,  # how long a detected frame can be reused for cropping
+}
+
+
+class FrameCache:
+    """
+    Small TTL + LRU cache of frames that detection ran on, keyed by frame_id.
+    Lets the classification step crop from the exact same frame.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[str, Tuple[float, str, np.ndarray]]" = OrderedDict()
+
+    def _evict(self, now: float, max_entries: int, ttl: float) -> None:
+        # Oldest entries sit at the front
+        while self._frames:
+            frame_id, (stored_at, _, _) = next(iter(self._frames.items()))
+            if len(self._frames) > max_entries or now - stored_at > ttl:
+                self._frames.pop(frame_id)
+            else:
+                break
+
+    def put(self, frame: np.ndarray, hls_url: str) -> str:
+        cfg = get_section(FRAME_CACHE_KEY, _DEFAULTS)
+        frame_id = uuid.uuid4().hex
+        now = time.monotonic()
+
+        with self._lock:
+            self._frames[frame_id] = (now, hls_url, frame)
+            self._evict(now, int(cfg["max_entries"]), float(cfg["ttl_seconds"]))
+
+        return frame_id
+
+    def get(self, frame_id: Optional[str], hls_url: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Returns the cached frame, or None if unknown/expired or if it was
+        captured from a different camera than `hls_url`.
+        """
+        if not frame_id:
+            return None
+
+        cfg = get_section(FRAME_CACHE_KEY, _DEFAULTS)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict(now, int(cfg["max_entries"]), float(cfg["ttl_seconds"]))
+            entry = self._frames.get(frame_id)
+            if entry is None:
+                return None
+
+            stored_at, cached_url, frame = entry
+            if now - stored_at > float(cfg["ttl_seconds"]):
+                self._frames.pop(frame_id)
+                return None
+            if hls_url is not None and cached_url != hls_url:
+                return None
+
+            self._frames.move_to_end(frame_id)
+            return frame
+
+
+FRAMES = FrameCache()
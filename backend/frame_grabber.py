@@ -0,0 +1,192 @@
+# frame_grabber.py
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from runtime_config import get_section
+
+FRAME_GRABBER_KEY = "Frame Grabber"
+
+_DEFAULTS = {
+    "idle_timeout": 60.0,      # stop a reader after N seconds without requests
+    "reconnect_delay": 2.0,    # wait between reconnect attempts
+    "open_timeout": 15.0,      # how long a first request waits for a frame
+    "max_frame_age": 10.0,     # frames older than this are treated as stale
+}
+
+
+def _settings() -> dict:
+    return get_section(FRAME_GRABBER_KEY, _DEFAULTS)
+
+
+class FrameGrabber:
+    """
+    One background reader per camera URL.
+    Keeps decoding the stream and holds only the latest frame.
+    """
+
+    def __init__(self, url: str, idle_timeout: float, reconnect_delay: float):
+        self.url = url
+        self.idle_timeout = float(idle_timeout)
+        self.reconnect_delay = float(reconnect_delay)
+
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_time = 0.0
+        self._frame_count = 0
+        self._last_access = time.monotonic()
+        self._last_error: Optional[str] = None
+
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"grabber-{url}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def _is_idle(self) -> bool:
+        return time.monotonic() - self._last_access > self.idle_timeout
+
+    def _run(self) -> None:
+        while not self._stop.is_set() and not self._is_idle():
+            cap = cv2.VideoCapture(self.url)
+            if not cap.isOpened():
+                cap.release()
+                self._last_error = f"Failed to open HLS stream from {self.url}"
+                print(f"[GRABBER] {self._last_error}, retrying in {self.reconnect_delay}s")
+                self._stop.wait(self.reconnect_delay)
+                continue
+
+            print(f"[GRABBER] Connected to {self.url}")
+            try:
+                while not self._stop.is_set() and not self._is_idle():
+                    ret, frame = cap.read()
+                    if not ret:
+                        self._last_error = "Failed to capture frame from HLS stream"
+                        print(f"[GRABBER] Lost {self.url}, reconnecting...")
+                        break
+
+                    # cap.read() allocates a fresh array each time, so readers
+                    # holding a previous frame are never written under.
+                    with self._lock:
+                        self._frame = frame
+                        self._frame_time = time.monotonic()
+                        self._frame_count += 1
+                        self._last_error = None
+                    self._ready.set()
+            finally:
+                cap.release()
+
+            if not self._stop.is_set() and not self._is_idle():
+                self._stop.wait(self.reconnect_delay)
+
+        self._stop.set()
+        print(f"[GRABBER] Stopped reader for {self.url}")
+
+    def latest(self) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """
+        Returns (frame, age_seconds) without blocking.
+        The frame is shared: callers must not modify it in place.
+        """
+        self._last_access = time.monotonic()
+        with self._lock:
+            if self._frame is None:
+                return None, None
+            return self._frame, time.monotonic() - self._frame_time
+
+    def wait_ready(self, timeout: float) -> bool:
+        self._last_access = time.monotonic()
+        return self._ready.wait(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            age = None if self._frame is None else time.monotonic() - self._frame_time
+            return {
+                "alive": self.alive,
+                "frame_age": age,
+                "frames_read": self._frame_count,
+                "last_error": self._last_error,
+            }
+
+
+class GrabberPool:
+    """
+    Registry of FrameGrabbers keyed by URL.
+    Readers start on first use and shut themselves down when idle.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grabbers: Dict[str, FrameGrabber] = {}
+
+    def _get_grabber(self, url: str) -> FrameGrabber:
+        with self._lock:
+            grabber = self._grabbers.get(url)
+            if grabber is None or not grabber.alive:
+                cfg = _settings()
+                grabber = FrameGrabber(
+                    url,
+                    idle_timeout=cfg["idle_timeout"],
+                    reconnect_delay=cfg["reconnect_delay"],
+                )
+                self._grabbers[url] = grabber
+                grabber.start()
+            return grabber
+
+    def peek(self, url: str) -> Optional[np.ndarray]:
+        """
+        Non-blocking: returns the latest fresh frame, or None if the reader
+        has no usable frame yet.
+        """
+        frame, age = self._get_grabber(url).latest()
+        if frame is None or age > float(_settings()["max_frame_age"]):
+            return None
+        return frame
+
+    def get_frame(self, url: str) -> np.ndarray:
+        """
+        Blocking: waits up to open_timeout for the first frame.
+        Raises if the stream never produced a frame or has gone stale.
+        """
+        cfg = _settings()
+        grabber = self._get_grabber(url)
+        grabber.wait_ready(float(cfg["open_timeout"]))
+
+        frame, age = grabber.latest()
+        if frame is None:
+            error = grabber.stats()["last_error"] or f"No frame received from {url}"
+            raise Exception(error)
+        if age > float(cfg["max_frame_age"]):
+            raise Exception(f"Stale frame from {url} ({age:.1f}s old)")
+        return frame
+
+    def frame_ages(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            grabbers = dict(self._grabbers)
+        return {url: g.stats()["frame_age"] for url, g in grabbers.items()}
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            grabbers = dict(self._grabbers)
+        return {url: g.stats() for url, g in grabbers.items()}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for grabber in self._grabbers.values():
+                grabber.stop()
+            self._grabbers.clear()
+
+
+GRABBERS = GrabberPool()
@@ -3,9 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 import pandas as pd
 import re
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pydantic import BaseModel
 
+from excel_import import load_sheet, refresh_sheet
+from runtime_config import DATA_DIR, EXCEL_FILE
+
 app = FastAPI()
 
 # CORS configuration
@@ -17,13 +20,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Constants
-DATA_DIR = "C:/Users/Fadhi Safeer/OneDrive/Documents/GitHub/Agrihub_Dashboard/backend"
-EXCEL_FILE = f"{DATA_DIR}/Excel_Data.xlsx"
 
 # Helper functions
 def parse_percentages(percentage_str: str) -> Dict[str, float]:
     """Parse percentage strings into dictionary"""
+    if isinstance(percentage_str, dict):
+        return percentage_str  # already parsed at import (excel_import.py)
     result = {}
     if isinstance(percentage_str, str):
         matches = re.findall(r'([^:,]+):\s*(\d+(?:\.\d+)?)%', percentage_str)
@@ -31,9 +33,21 @@ def parse_percentages(percentage_str: str) -> Dict[str, float]:
             result[label.strip().lower()] = float(value)
     return result
 
-def load_data(sheet_name: str) -> pd.DataFrame:
-    """Load and clean data from Excel sheet"""
-    df = pd.read_excel(EXCEL_FILE, sheet_name=sheet_name)
+def load_data(sheet_name: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load TIMESTAMP plus `columns` (default all) from the imported store, after
+    importing rows appended to the Excel sheet since the last request.
+    Falls back to reading the Excel sheet if that import fails.
+    """
+    try:
+        refresh_sheet(EXCEL_FILE, sheet_name)
+        df = load_sheet(sheet_name, columns)
+        if df is not None:
+            return df
+    except Exception as e:
+        print(f"[GRAPH] Could not import {sheet_name} from {EXCEL_FILE}, reading the workbook: {e}")
+    usecols = None if columns is None else (lambda c: c == 'TIMESTAMP' or c in columns)
+    df = pd.read_excel(EXCEL_FILE, sheet_name=sheet_name, usecols=usecols)
     if 'TIMESTAMP' in df.columns:
         df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'], errors='coerce')
         df = df.dropna(subset=['TIMESTAMP'])
@@ -43,7 +57,7 @@ def load_data(sheet_name: str) -> pd.DataFrame:
 @app.get("/api/growth/timeline")
 async def growth_stage_timeline():
     """1. Growth Stage Timeline (Stacked Area Chart)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['GROWTH_STAGE (%)'])
     df['growth_stages'] = df['GROWTH_STAGE (%)'].apply(parse_percentages)
     
     timeline_data = []
@@ -68,8 +82,8 @@ async def growth_stage_timeline():
 @app.get("/api/growth/environmental-factors")
 async def growth_vs_environmental():
     """2. Growth Rate vs. Environmental Factors (Combination Chart)"""
-    sensor_df = load_data("SensorData")
-    detection_df = load_data("DetectionData")
+    sensor_df = load_data("SensorData", ['TEMP (°C)', 'EC (µS/cm)'])
+    detection_df = load_data("DetectionData", ['GROWTH_STAGE (%)'])
     detection_df['growth_stages'] = detection_df['GROWTH_STAGE (%)'].apply(parse_percentages)
     
     # Merge data on nearest timestamp
@@ -97,7 +111,7 @@ async def growth_vs_environmental():
 @app.get("/api/growth/distribution-by-location")
 async def growth_by_location():
     """3. Growth Stage Distribution by Camera Location (Grouped Bar Chart)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['CAMERA_ID', 'GROWTH_STAGE (%)'])
     df['growth_stages'] = df['GROWTH_STAGE (%)'].apply(parse_percentages)
     
     camera_stats = {}
@@ -124,7 +138,7 @@ async def growth_by_location():
 @app.get("/api/disease/prevalence")
 async def disease_prevalence():
     """1. Disease Prevalence Timeline (Stacked Area Chart)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['DISEASE_STATUS (%)'])
     df['diseases'] = df['DISEASE_STATUS (%)'].apply(parse_percentages)
     
     timeline_data = []
@@ -155,8 +169,8 @@ async def disease_prevalence():
 @app.get("/api/disease/environmental-triggers")
 async def disease_triggers():
     """2. Environmental Triggers for Disease (Multi-line Chart)"""
-    sensor_df = load_data("SensorData")
-    detection_df = load_data("DetectionData")
+    sensor_df = load_data("SensorData", ['TEMP (°C)', 'HUMIDITY (%)'])
+    detection_df = load_data("DetectionData", ['DISEASE_STATUS (%)'])
     detection_df['diseases'] = detection_df['DISEASE_STATUS (%)'].apply(parse_percentages)
     
     merged = pd.merge_asof(
@@ -183,7 +197,7 @@ async def disease_triggers():
 @app.get("/api/disease/hotspots")
 async def disease_hotspots():
     """3. Disease Hotspot Map (Radar Chart)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['CAMERA_ID', 'DISEASE_STATUS (%)'])
     df['diseases'] = df['DISEASE_STATUS (%)'].apply(parse_percentages)
     
     camera_stats = {}
@@ -244,7 +258,7 @@ async def disease_hotspots():
 @app.get("/api/health/deficiency-timeline")
 async def nutrient_deficiency_timeline():
     """1. Nutrient Deficiency Timeline (Stacked Area Chart)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['HEALTH_STATUS (%)'])
     df['health_status'] = df['HEALTH_STATUS (%)'].apply(parse_percentages)
     
     timeline_data = []
@@ -271,8 +285,8 @@ async def nutrient_deficiency_timeline():
 @app.get("/api/health/ec-ph-correlation")
 async def ec_ph_correlation():
     """2. EC/pH vs. Nutrient Deficiencies (Combination Chart)"""
-    sensor_df = load_data("SensorData")
-    detection_df = load_data("DetectionData")
+    sensor_df = load_data("SensorData", ['EC (µS/cm)', 'PH'])
+    detection_df = load_data("DetectionData", ['HEALTH_STATUS (%)'])
     detection_df['health_status'] = detection_df['HEALTH_STATUS (%)'].apply(parse_percentages)
     
     merged = pd.merge_asof(
@@ -301,7 +315,7 @@ async def ec_ph_correlation():
 @app.get("/api/health/status-by-growth")
 async def health_by_growth_stage():
     """3. Health Status by Growth Stage (Heat Map)"""
-    df = load_data("DetectionData")
+    df = load_data("DetectionData", ['HEALTH_STATUS (%)', 'GROWTH_STAGE (%)'])
     df['health_status'] = df['HEALTH_STATUS (%)'].apply(parse_percentages)
     df['growth_stages'] = df['GROWTH_STAGE (%)'].apply(parse_percentages)
     
@@ -0,0 +1,166 @@
+# image_writer.py
+import os
+import queue
+import shutil
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from encoded_image import EncodedCrop
+from runtime_config import get_section
+
+IMAGE_WRITER_KEY = "Image Writer"
+
+_DEFAULTS = {
+    "workers": 2,        # writer threads
+    "max_queue": 256,    # pending writes (over all workers) before new ones are dropped
+    "batch_size": 32,    # writes a worker groups per directory in one go
+}
+
+
+def _clear_files(directory: str) -> None:
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            os.remove(entry.path)
+        elif entry.is_dir():
+            shutil.rmtree(entry.path)
+
+
+class WriteTask:
+    """
+    One image to persist.
+    replace_dir: clear the directory first (camera_view keeps a single snapshot).
+    """
+
+    __slots__ = ("directory", "filename", "image", "replace_dir")
+
+    def __init__(
+        self,
+        directory: str,
+        filename: str,
+        image: EncodedCrop,
+        replace_dir: bool = False,
+    ):
+        self.directory = directory
+        self.filename = filename
+        self.image = image
+        self.replace_dir = replace_dir
+
+
+class ImageWriter:
+    """
+    Background image persistence with a bounded queue.
+
+    The websocket handler only enqueues; encoding and disk I/O happen on
+    worker threads. When the disk is slow and the queue fills up, new
+    writes are dropped (and counted) instead of stalling inference.
+
+    Each directory always goes to the same worker (one queue per worker),
+    so writes and clears of one directory happen in submission order.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: List[queue.Queue] = []
+        self._workers: List[threading.Thread] = []
+        self._batch_size = _DEFAULTS["batch_size"]
+        self._written = 0
+        self._skipped = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def _ensure_started(self) -> List[queue.Queue]:
+        with self._lock:
+            if not self._queues:
+                cfg = get_section(IMAGE_WRITER_KEY, _DEFAULTS)
+                workers = max(1, int(cfg["workers"]))
+                per_worker = max(1, -(-int(cfg["max_queue"]) // workers))
+                self._batch_size = max(1, int(cfg["batch_size"]))
+                for i in range(workers):
+                    q = queue.Queue(maxsize=per_worker)
+                    worker = threading.Thread(
+                        target=self._run, args=(q,), name=f"image-writer-{i}", daemon=True
+                    )
+                    worker.start()
+                    self._queues.append(q)
+                    self._workers.append(worker)
+            return self._queues
+
+    def submit(self, task: WriteTask) -> bool:
+        """Queues a write; returns False if it was dropped because the queue is full."""
+        queues = self._ensure_started()
+        # Stable across runs, unlike hash() of a str
+        q = queues[zlib.crc32(task.directory.encode("utf-8")) % len(queues)]
+        try:
+            q.put_nowait(task)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            print(f"[WRITER] Queue full, dropped {task.filename}")
+            return False
+
+    def _next_batch(self, q: queue.Queue) -> List[WriteTask]:
+        batch = [q.get()]
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def join(self) -> None:
+        """Blocks until every queued write has been handled."""
+        for q in list(self._queues):
+            q.join()
+
+    def _run(self, q: queue.Queue) -> None:
+        while True:
+            batch = self._next_batch(q)
+            try:
+                by_dir: Dict[str, List[WriteTask]] = OrderedDict()
+                for task in batch:
+                    by_dir.setdefault(task.directory, []).append(task)
+                for directory, tasks in by_dir.items():
+                    self._write_directory(directory, tasks)
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+    def _write_directory(self, directory: str, tasks: List[WriteTask]) -> None:
+        try:
+            # Once per batch and directory; also recreates a directory that vanished (e.g. OneDrive)
+            os.makedirs(directory, exist_ok=True)
+
+            # A replacing write only needs the newest snapshot
+            replacing = [t for t in tasks if t.replace_dir]
+            if replacing:
+                _clear_files(directory)
+                tasks = [t for t in tasks if not t.replace_dir] + [replacing[-1]]
+                with self._lock:
+                    self._skipped += len(replacing) - 1
+
+            for task in tasks:
+                with open(os.path.join(directory, task.filename), "wb") as f:
+                    f.write(task.image.jpeg)
+                with self._lock:
+                    self._written += 1
+
+        except Exception as e:
+            with self._lock:
+                self._failed += len(tasks)
+            print(f"[WRITER] Failed writing to {directory}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": sum(q.qsize() for q in self._queues),
+                "written": self._written,
+                "skipped": self._skipped,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+
+IMAGE_WRITER = ImageWriter()
@@ -0,0 +1,199 @@
+# inference_backends.py
+import shutil
+import threading
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+from model_precision import (
+    FP32,
+    INT8,
+    apply_torch_precision,
+    calibration_files,
+    normalize_precision,
+    preprocess,
+    quantize_onnx_static,
+)
+from model_precision import settings as precision_settings
+from runtime_config import get_section
+
+INFERENCE_BACKEND_KEY = "Inference Backend"
+
+# Data.json -> "Model" -> <key> -> "backend"
+PYTORCH = "pytorch"
+ONNX = "onnx"
+OPENVINO = "openvino"
+BACKENDS = (PYTORCH, ONNX, OPENVINO)
+
+_DEFAULTS = {
+    "export_dir": "backend/Models/exported",   # cache of exported artifacts, keyed by weight hash
+    "parity_tolerance": 0.02,                  # max allowed prob / normalized box difference
+    "parity_check": True,
+    "parity_images": 8,                        # saved images (snapshots / crops) the models are compared on
+}
+
+# Exports of the same weights must not race each other
+_EXPORT_LOCK = threading.Lock()
+
+
+def _settings() -> dict:
+    return get_section(INFERENCE_BACKEND_KEY, _DEFAULTS)
+
+
+def normalize_backend(value) -> str:
+    backend = str(value or PYTORCH).strip().lower()
+    if backend not in BACKENDS:
+        print(f"[BACKEND] Unknown backend '{value}', using {PYTORCH}")
+        return PYTORCH
+    return backend
+
+
+def _export_artifact(cache_dir: Path, stem: str, backend: str) -> Path:
+    # Paths ultralytics produces next to "<stem>.pt"
+    if backend == ONNX:
+        return cache_dir / f"{stem}.onnx"
+    return cache_dir / f"{stem}_openvino_model"
+
+
+def export_model(path: str, digest: str, backend: str, imgsz: int) -> Path:
+    """
+    Exports the .pt weights for `backend` once and caches the artifact under
+    export_dir/<digest>/. Later calls with the same weights reuse it.
+    """
+    cache_dir = Path(_settings()["export_dir"]) / digest[:16]
+    stem = "model"
+    artifact = _export_artifact(cache_dir, stem, backend)
+
+    with _EXPORT_LOCK:
+        if artifact.exists():
+            return artifact
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cached_pt = cache_dir / f"{stem}.pt"
+        if not cached_pt.exists():
+            shutil.copyfile(path, cached_pt)
+
+        print(f"[BACKEND] Exporting {path} to {backend} (imgsz={imgsz})...")
+        # dynamic=True keeps the batch axis free for batched classification
+        YOLO(str(cached_pt)).export(format=backend, imgsz=imgsz, dynamic=True)
+
+        if not artifact.exists():
+            raise Exception(f"Export to {backend} did not produce {artifact}")
+        return artifact
+
+
+def _detection_parity_inputs() -> list:
+    # Real frames: a noise frame rarely yields boxes, which would prove nothing
+    images = []
+    for f in calibration_files("Detection", int(_settings()["parity_images"])):
+        image = cv2.imread(str(f))
+        if image is not None:
+            images.append(image)
+    if not images:
+        raise Exception("no saved camera_view snapshots to compare on")
+    return images
+
+
+def _classifier_parity_input(key: str, imgsz: int) -> torch.Tensor:
+    # The saved crops INT8 calibration uses; noise is outside what the models see
+    batch = []
+    for f in calibration_files(key, int(_settings()["parity_images"])):
+        image = cv2.imread(str(f))
+        if image is not None:
+            batch.append(preprocess(image, imgsz))
+    if not batch:
+        raise Exception("no saved crops to compare on")
+    return torch.from_numpy(np.concatenate(batch))
+
+
+def parity_error(key: str, reference, candidate, imgsz: int, device) -> float:
+    """
+    Largest difference between the PyTorch fp32 model and a candidate on
+    saved images: class probabilities on classified crops for classifiers,
+    normalized box coordinates and confidences on camera_view snapshots for
+    the detector. Raises when the comparison is inconclusive.
+    """
+    kwargs = dict(imgsz=imgsz, device=device, verbose=False)
+
+    if key == "Detection":
+        error, boxes = 0.0, 0
+        for image in _detection_parity_inputs():
+            ref = reference.predict(source=image, **kwargs)[0].boxes.data.float().cpu().numpy()
+            cand = candidate.predict(source=image, **kwargs)[0].boxes.data.float().cpu().numpy()
+            if len(ref) != len(cand):
+                return float("inf")
+            if len(ref) == 0:
+                continue
+            boxes += len(ref)
+            ref = ref[np.argsort(-ref[:, 4])]
+            cand = cand[np.argsort(-cand[:, 4])]
+            box_err = np.abs(ref[:, :4] - cand[:, :4]).max() / max(image.shape[:2])
+            conf_err = np.abs(ref[:, 4] - cand[:, 4]).max()
+            error = max(error, float(box_err), float(conf_err))
+        if boxes == 0:
+            raise Exception("no boxes detected on any snapshot, nothing to compare")
+        return error
+
+    source = _classifier_parity_input(key, imgsz)
+    ref = np.stack([r.probs.data.float().cpu().numpy() for r in reference.predict(source=source, **kwargs)])
+    cand = np.stack([r.probs.data.float().cpu().numpy() for r in candidate.predict(source=source, **kwargs)])
+    return float(np.abs(ref - cand).max())
+
+
+def load_backend_model(key: str, path: str, digest: str, backend: str, imgsz: int, device, precision: str = FP32):
+    """
+    Returns (model, label): a YOLO instance running on the requested
+    backend/precision and a label like "onnx/int8" describing it.
+    Anything other than PyTorch fp32 must pass a parity check against the
+    PyTorch fp32 weights; otherwise PyTorch fp32 is used.
+    """
+    torch_model = YOLO(path)
+    if key != "Detection":
+        torch_model = torch_model.to(device)
+
+    backend = normalize_backend(backend)
+    precision = normalize_precision(precision)
+    if backend == PYTORCH and precision == FP32:
+        return torch_model, PYTORCH
+
+    try:
+        if backend == PYTORCH:
+            model = YOLO(path)
+            if key != "Detection":
+                model = model.to(device)
+            model = apply_torch_precision(model, precision, device)
+        else:
+            artifact = export_model(path, digest, backend, imgsz)
+            if precision == INT8 and backend == ONNX:
+                artifact = quantize_onnx_static(artifact, key, imgsz)
+            elif precision != FP32:
+                print(f"[BACKEND] {key}: {precision} is not supported on {backend}, using fp32")
+                precision = FP32
+            model = YOLO(str(artifact), task=torch_model.task)
+    except Exception as e:
+        print(f"[BACKEND] {key}: {backend}/{precision} unavailable ({e}), using {PYTORCH}")
+        return torch_model, PYTORCH
+
+    label = backend if precision == FP32 else f"{backend}/{precision}"
+
+    cfg = _settings()
+    if cfg.get("parity_check", True):
+        try:
+            error = parity_error(key, torch_model, model, imgsz, device)
+        except Exception as e:
+            print(f"[BACKEND] {key}: parity check inconclusive ({e}), using {PYTORCH}")
+            return torch_model, PYTORCH
+
+        if precision == FP32:
+            tolerance = float(cfg["parity_tolerance"])
+        else:
+            tolerance = float(precision_settings()["reduced_precision_tolerance"])
+        if error > tolerance:
+            print(f"[BACKEND] {key}: {label} parity error {error:.4f} > {tolerance}, using {PYTORCH}")
+            return torch_model, PYTORCH
+        print(f"[BACKEND] {key}: {label} parity error {error:.4f} (ok)")
+
+    return model, label
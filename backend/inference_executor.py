@@ -0,0 +1,91 @@
+# inference_executor.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from runtime_config import get_section
+
+INFERENCE_KEY = "Inference"
+
+_DEFAULTS = {
+    "workers": 2,      # model.predict calls running at the same time
+    "max_queue": 8,    # extra calls allowed to wait for a worker
+}
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue is at capacity."""
+
+
+class InferenceExecutor:
+    """
+    Runs blocking model.predict work on a dedicated thread pool so the
+    websocket event loop stays responsive. Admission is bounded: once
+    workers + max_queue calls are pending, new calls fail fast.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._workers = 0
+        self._capacity = 0
+        self._pending = 0
+        self._rejected = 0
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                cfg = get_section(INFERENCE_KEY, _DEFAULTS)
+                self._workers = max(1, int(cfg["workers"]))
+                self._capacity = self._workers + max(0, int(cfg["max_queue"]))
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self._workers,
+                    thread_name_prefix="inference",
+                )
+                print(f"[INFERENCE] Executor started with {self._workers} worker(s), capacity {self._capacity}")
+            return self._pool
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self._capacity:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    f"Inference queue full ({self._pending}/{self._capacity} pending)"
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        pool = self._ensure_pool()
+        self._acquire()
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the work itself ends: a cancelled caller releases
+        # it right away only if the job had not started (cancelling it in the pool)
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "capacity": self._capacity,
+                "pending": self._pending,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+INFERENCE = InferenceExecutor()
@@ -0,0 +1,126 @@
+# inference_scheduler.py
+import asyncio
+import time
+from typing import Dict, Optional
+
+from inference_executor import InferenceQueueFull
+from result_hub import RESULTS, ResultHub
+from runtime_config import get_section
+from yolo_processing import camera_cycle, get_cam_num
+
+SCHEDULER_KEY = "Scheduler"
+
+_DEFAULTS = {
+    "enabled": False,
+    "cameras": [],                      # HLS urls analysed without any client
+    "target_interval": 15.0,            # seconds between cycles of one camera
+    "camera_intervals": {},             # optional per-camera override, e.g. {"camera1": 30}
+    "max_inferences_per_second": 0.5,   # global budget across all cameras
+}
+
+_MAX_SLEEP = 1.0   # re-read config and subscriptions at least this often
+
+
+def _settings() -> dict:
+    return get_section(SCHEDULER_KEY, _DEFAULTS)
+
+
+class InferenceScheduler:
+    """
+    Server-side loop that cycles through the configured cameras (plus any
+    camera with websocket subscribers) and publishes each result to the
+    ResultHub.
+
+    The camera that is most overdue always goes next (fair round-robin),
+    and cycle starts are spaced by the global inference budget.
+    """
+
+    def __init__(self, hub: ResultHub):
+        self.hub = hub
+        self._task: Optional[asyncio.Task] = None
+        self._next_due: Dict[str, float] = {}
+        self._last_start = 0.0
+        self._cycles = 0
+        self._failures = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _sync_cameras(self, cameras: list, now: float) -> None:
+        for url in cameras:
+            self._next_due.setdefault(url, now)
+        for url in list(self._next_due):
+            if url not in cameras:
+                del self._next_due[url]
+
+    async def _interval_for(self, url: str, cfg: dict) -> float:
+        overrides = cfg.get("camera_intervals") or {}
+        cam_num = await get_cam_num(url)
+        return float(overrides.get(cam_num, cfg["target_interval"]))
+
+    async def _run(self) -> None:
+        print("[SCHEDULER] Started")
+        while True:
+            cfg = _settings()
+            cameras = []
+            if cfg.get("enabled"):
+                cameras = [c for c in (cfg.get("cameras") or []) if isinstance(c, str) and c]
+
+            # Cameras that websocket clients subscribed to are analysed too
+            for url in self.hub.demanded_urls():
+                if url not in cameras:
+                    cameras.append(url)
+
+            if not cameras:
+                self._next_due.clear()
+                await asyncio.sleep(_MAX_SLEEP)
+                continue
+
+            now = time.monotonic()
+            self._sync_cameras(cameras, now)
+
+            url = min(self._next_due, key=self._next_due.get)
+            rate = float(cfg["max_inferences_per_second"])
+            budget_at = self._last_start + (1.0 / rate if rate > 0 else 0.0)
+            wait = max(self._next_due[url], budget_at) - now
+            if wait > 0:
+                await asyncio.sleep(min(wait, _MAX_SLEEP))
+                continue
+
+            self._last_start = now
+            self._next_due[url] = now + await self._interval_for(url, cfg)
+
+            try:
+                # Coalesced with client requests; publishes to the hub itself
+                await camera_cycle(url)
+                self._cycles += 1
+            except asyncio.CancelledError:
+                raise
+            except InferenceQueueFull:
+                # Client traffic is saturating the executor; try again shortly
+                self._next_due[url] = now + _MAX_SLEEP
+            except Exception as e:
+                self._failures += 1
+                print(f"[SCHEDULER] Cycle failed for {url}: {e}")
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "cycles": self._cycles,
+            "failures": self._failures,
+            "next_due_in": {url: max(0.0, due - now) for url, due in self._next_due.items()},
+        }
+
+
+SCHEDULER = InferenceScheduler(RESULTS)
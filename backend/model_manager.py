@@ -0,0 +1,262 @@
+# model_manager.py
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import torch
+
+from inference_backends import PYTORCH, load_backend_model, normalize_backend
+from model_precision import FP32, normalize_precision
+from runtime_config import get_section, read_data_json
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+MODEL_RELOAD_KEY = "Model Reload"
+
+_DEFAULTS = {
+    "check_interval": 5.0,   # seconds between Data.json / weight file checks
+}
+
+# Data.json "Model" keys served by the vision pipeline, with warm-up input sizes
+MODEL_KEYS = {
+    "Detection": 640,
+    "Growth": 224,
+    "Health": 224,
+    "Disease": 224,
+}
+
+_DEFAULT_CONF = {
+    "Detection": 0.6,
+    "Growth": 0.8,
+    "Health": 0.85,
+    "Disease": 0.85,
+}
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a weight file, streamed so large files stay cheap on memory."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_signature(path: str):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class _ModelSlot:
+    """One model key: the live instance plus what it was loaded from."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.model = None
+        self.conf = _DEFAULT_CONF[key]
+        self.path: Optional[str] = None
+        self.signature = None
+        self.digest: Optional[str] = None
+        self.variant = (PYTORCH, FP32)  # (backend, precision) requested in Data.json
+        self.active_backend = PYTORCH   # what actually serves, e.g. "onnx/int8" (after parity check)
+        self.version = 0
+        self.loading = False
+        self.failed = None   # (path, signature, variant) of the last load that failed
+
+
+class ModelManager:
+    """
+    Owns the detection and classification models.
+
+    Models are reloaded one at a time, and only when their configured path,
+    backend, precision or weight file content changes. Reloads happen on a background thread:
+    the new weights are loaded, warmed up and then swapped in atomically,
+    while requests already holding the old instance finish with it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: Dict[str, _ModelSlot] = {key: _ModelSlot(key) for key in MODEL_KEYS}
+        self._last_check = 0.0
+        self._check_interval = float(_DEFAULTS["check_interval"])   # refreshed on each check
+        self._swap_listeners = []
+        self.image_folder = "backend/Images/"
+
+    # -------------------------
+    # Live instances
+    # -------------------------
+    @property
+    def detection_model(self):
+        return self._slots["Detection"].model
+
+    @property
+    def growth_model(self):
+        return self._slots["Growth"].model
+
+    @property
+    def health_model(self):
+        return self._slots["Health"].model
+
+    @property
+    def disease_model(self):
+        return self._slots["Disease"].model
+
+    @property
+    def det_conf(self) -> float:
+        return self._slots["Detection"].conf
+
+    @property
+    def growth_conf(self) -> float:
+        return self._slots["Growth"].conf
+
+    @property
+    def health_conf(self) -> float:
+        return self._slots["Health"].conf
+
+    @property
+    def disease_conf(self) -> float:
+        return self._slots["Disease"].conf
+
+    def versions(self) -> Dict[str, int]:
+        return {key: slot.version for key, slot in self._slots.items()}
+
+    def snapshot(self, keys) -> Dict[str, tuple]:
+        """
+        (model, conf, version) per key, read under the lock so a concurrent
+        swap cannot pair one model with another model's version.
+        """
+        with self._lock:
+            return {key: (self._slots[key].model, self._slots[key].conf, self._slots[key].version) for key in keys}
+
+    def backends(self) -> Dict[str, str]:
+        return {key: slot.active_backend for key, slot in self._slots.items()}
+
+    def add_swap_listener(self, listener: Callable[[str, int], None]) -> None:
+        """listener(key, version) is called after a model has been swapped."""
+        self._swap_listeners.append(listener)
+
+    # -------------------------
+    # Loading
+    # -------------------------
+    def ensure_loaded(self):
+        # Called on every inference: between checks this touches neither Data.json nor the lock
+        now = time.monotonic()
+        first_load = any(slot.model is None for slot in self._slots.values())
+        if not first_load and now - self._last_check < self._check_interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            first_load = any(slot.model is None for slot in self._slots.values())
+            if not first_load and now - self._last_check < self._check_interval:
+                return
+            self._last_check = now
+            self._check_locked()
+
+    def _check_locked(self):
+        self._check_interval = float(get_section(MODEL_RELOAD_KEY, _DEFAULTS)["check_interval"])
+        data = read_data_json()
+        models = data.get("Model") or {}
+
+        folder = (data.get("Image Folder") or {}).get("path")
+        if isinstance(folder, str) and folder:
+            self.image_folder = folder
+
+        for key, slot in self._slots.items():
+            cfg = models.get(key)
+            if not isinstance(cfg, dict) or not cfg.get("path"):
+                if slot.model is None:
+                    raise Exception(f"Data.json missing 'Model.{key}.path'")
+                continue
+
+            # Confidence changes are free: apply them immediately
+            slot.conf = float(cfg.get("confidence", slot.conf))
+
+            path = str(cfg["path"])
+            variant = (normalize_backend(cfg.get("backend")), normalize_precision(cfg.get("precision")))
+            try:
+                signature = _file_signature(path)
+            except OSError as e:
+                if slot.model is None:
+                    raise
+                print(f"[MODELS] {key}: cannot stat {path}: {e}")
+                continue
+
+            if path == slot.path and signature == slot.signature and variant == slot.variant:
+                continue
+            if slot.loading or slot.failed == (path, signature, variant):
+                continue
+
+            if slot.model is None:
+                # Nothing to serve yet: hash and load inline
+                digest = file_digest(path)
+                model, active = self._load(key, path, digest, variant)
+                self._install(slot, model, active, path, signature, digest, variant)
+            else:
+                # Hashing a large weight file must not hold the lock other callers need
+                slot.loading = True
+                threading.Thread(
+                    target=self._reload_in_background,
+                    args=(slot, path, signature, variant),
+                    name=f"reload-{key}",
+                    daemon=True,
+                ).start()
+
+    def _load(self, key: str, path: str, digest: str, variant: tuple):
+        backend, precision = variant
+        model, active = load_backend_model(key, path, digest, backend, MODEL_KEYS[key], device, precision)
+        self._warm_up(key, model)
+        return model, active
+
+    def _warm_up(self, key: str, model) -> None:
+        size = MODEL_KEYS[key]
+        if key == "Detection":
+            source = np.zeros((size, size, 3), dtype=np.uint8)
+        else:
+            source = torch.zeros((1, 3, size, size))
+        model.predict(source=source, imgsz=size, device=device, verbose=False)
+
+    def _install(self, slot: _ModelSlot, model, active: str, path: str, signature, digest: str, variant: tuple) -> None:
+        # Single reference assignment: readers see either the old or the new model
+        slot.model = model
+        slot.active_backend = active
+        slot.path = path
+        slot.signature = signature
+        slot.digest = digest
+        slot.variant = variant
+        slot.version += 1
+        print(f"[MODELS] {slot.key} ready (v{slot.version}, {active}) from {path}")
+
+        for listener in list(self._swap_listeners):
+            try:
+                listener(slot.key, slot.version)
+            except Exception as e:
+                print(f"[MODELS] Swap listener failed for {slot.key}: {e}")
+
+    def _reload_in_background(self, slot: _ModelSlot, path: str, signature, variant: tuple) -> None:
+        try:
+            digest = file_digest(path)
+            with self._lock:
+                if path == slot.path and digest == slot.digest and variant == slot.variant:
+                    # Touched but identical weights
+                    slot.signature = signature
+                    slot.loading = False
+                    return
+            model, active = self._load(slot.key, path, digest, variant)
+        except Exception as e:
+            print(f"[MODELS] Reload of {slot.key} from {path} failed, keeping current model: {e}")
+            with self._lock:
+                slot.failed = (path, signature, variant)
+                slot.loading = False
+            return
+
+        with self._lock:
+            self._install(slot, model, active, path, signature, digest, variant)
+            slot.failed = None
+            slot.loading = False
+
+
+MODELS = ModelManager()
@@ -0,0 +1,169 @@
+# model_precision.py
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+import torch
+
+from runtime_config import get_section
+
+MODEL_PRECISION_KEY = "Model Precision"
+
+# Data.json -> "Model" -> <key> -> "precision"
+FP32 = "fp32"
+BF16 = "bf16"   # CPU autocast, PyTorch backend only
+INT8 = "int8"   # ONNX backend only: static quantization with calibration
+PRECISIONS = (FP32, BF16, INT8)
+
+_DEFAULTS = {
+    "calibration_images": 200,            # saved images used for static INT8 calibration
+    "reduced_precision_tolerance": 0.15,  # parity tolerance for bf16 / int8 models
+}
+
+
+def settings() -> dict:
+    return get_section(MODEL_PRECISION_KEY, _DEFAULTS)
+
+
+def normalize_precision(value) -> str:
+    precision = str(value or FP32).strip().lower()
+    if precision not in PRECISIONS:
+        print(f"[PRECISION] Unknown precision '{value}', using {FP32}")
+        return FP32
+    return precision
+
+
+def bf16_supported() -> bool:
+    """True when the CPU has native bf16 support (AVX512-BF16 / AMX)."""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except Exception:
+        return False
+
+
+class AutocastModel:
+    """
+    Wraps a YOLO model so predict() runs under CPU bf16 autocast.
+    Every other attribute (names, task, ...) is passed through.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def predict(self, *args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return self._model.predict(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def apply_torch_precision(model, precision: str, device):
+    """
+    Returns `model` (a PyTorch YOLO) set up for `precision`.
+    Raises if the precision cannot run on this machine or backend.
+    """
+    if precision == FP32:
+        return model
+
+    if precision == INT8:
+        # Dynamic quantization only covers nn.Linear: the detector has none and the
+        # classifiers only their final layer, so the result would still be fp32.
+        raise Exception("int8 needs the onnx backend (static quantization of the convolutions)")
+
+    if device.type != "cpu":
+        raise Exception(f"{precision} mode is only implemented for CPU inference")
+
+    if not bf16_supported():
+        raise Exception("CPU has no native bf16 support")
+    return AutocastModel(model)
+
+
+# -------------------------
+# Calibration data
+# -------------------------
+def calibration_files(key: str, limit: int) -> List[Path]:
+    """
+    Saved images from the camera storage tree: classified crops for the
+    classifiers, camera_view snapshots for the detector.
+    """
+    folder = get_section("Image Folder", {"path": "backend/Images/"})["path"]
+    root = Path(folder)
+    if not root.exists():
+        return []
+
+    want_views = key == "Detection"
+    files = []
+    for p in root.rglob("*.jpg"):
+        if ("camera_view" in p.parts) != want_views:
+            continue
+        files.append(p)
+        if len(files) >= limit:
+            break
+    return files
+
+
+def preprocess(image_bgr: np.ndarray, imgsz: int) -> np.ndarray:
+    """BGR image -> (1, 3, imgsz, imgsz) float32 in [0, 1], as fed to the models."""
+    rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+    resized = cv2.resize(rgb, (imgsz, imgsz))
+    return (resized.transpose(2, 0, 1)[None].astype(np.float32)) / 255.0
+
+
+def quantize_onnx_static(onnx_path: Path, key: str, imgsz: int) -> Path:
+    """
+    Static INT8 quantization of an exported ONNX model, calibrated on
+    saved images. The result is cached next to the fp32 artifact.
+    """
+    out_path = onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+    if out_path.exists():
+        return out_path
+
+    import onnx
+    import onnxruntime
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    files = calibration_files(key, int(settings()["calibration_images"]))
+    if not files:
+        raise Exception("No saved images found for INT8 calibration")
+
+    session = onnxruntime.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._files = iter(files)
+
+        def get_next(self):
+            for f in self._files:
+                image = cv2.imread(str(f))
+                if image is not None:
+                    return {input_name: preprocess(image, imgsz)}
+            return None
+
+    print(f"[PRECISION] Calibrating {key} INT8 on {len(files)} image(s)...")
+    tmp_path = out_path.with_suffix(".tmp.onnx")
+    quantize_static(
+        str(onnx_path),
+        str(tmp_path),
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+    # Keep the ultralytics metadata (class names, imgsz, task) on the quantized model
+    quantized = onnx.load(str(tmp_path))
+    source = onnx.load(str(onnx_path))
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, str(out_path))
+    tmp_path.unlink(missing_ok=True)
+
+    return out_path
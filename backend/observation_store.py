@@ -0,0 +1,499 @@
+# observation_store.py
+"""
+Append-only store of plant observations (one row per classified plant).
+
+SQLite in WAL mode: the websocket process appends through a background
+writer thread in batched transactions, while the FastAPI process reads
+concurrently. agrivision_data.xlsx is only an export of this table,
+regenerated periodically off the hot path. Each export rewrites the whole
+history (xlsx cannot be appended to in place), so its cost grows with the
+table; /agrivision/export serves filtered slices on demand instead.
+"""
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from openpyxl import Workbook, load_workbook
+
+from runtime_config import get_section, read_data_json
+
+OBSERVATION_STORE_KEY = "Observation Store"
+
+_DEFAULTS = {
+    "path": "backend/Data/observations.db",
+    "batch_size": 200,              # rows per insert transaction
+    "flush_interval": 1.0,          # seconds a row may wait for its batch
+    "excel_export_interval": 3600,  # seconds between full agrivision_data.xlsx rewrites; 0 disables
+}
+
+COLUMNS = [
+    "date", "time", "camera_number", "plant_id",
+    "growth", "health", "disease",
+    "disease_status", "health_status",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    date           TEXT NOT NULL,
+    time           TEXT NOT NULL,
+    camera_number  TEXT NOT NULL,
+    plant_id       TEXT,
+    growth         TEXT,
+    health         TEXT,
+    disease        TEXT,
+    disease_status INTEGER,
+    health_status  INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_observations_date_camera ON observations (date, camera_number);
+CREATE INDEX IF NOT EXISTS idx_observations_camera_date ON observations (camera_number, date);
+CREATE INDEX IF NOT EXISTS idx_observations_plant ON observations (plant_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_INSERT = (
+    f"INSERT INTO observations ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+
+def _settings() -> dict:
+    return get_section(OBSERVATION_STORE_KEY, _DEFAULTS)
+
+
+def store_path(path: Optional[str] = None) -> Path:
+    return Path(path or _settings()["path"])
+
+
+def connect(path: Optional[str] = None, readonly: bool = False) -> sqlite3.Connection:
+    """A new connection to the store (one per thread)."""
+    db_path = store_path(path)
+    if readonly:
+        conn = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+
+
+def _where(
+    start_date: Optional[str],
+    end_date: Optional[str],
+    camera: Optional[str],
+    after_id: Optional[int] = None,
+):
+    clauses, params = [], []
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if camera is not None:
+        clauses.append("camera_number = ?")
+        params.append(str(camera))
+    if after_id is not None:
+        clauses.append("id > ?")
+        params.append(after_id)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+# -------------------------
+# Reader API
+# -------------------------
+def iter_chunks(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    camera: Optional[str] = None,
+    columns: Sequence[str] = COLUMNS,
+    chunk_size: int = 1000,
+    path: Optional[str] = None,
+    after_id: int = 0,
+) -> Iterator[List[tuple]]:
+    """
+    Yields matching rows (tuples in `columns` order) in chunks, oldest
+    first. Uses keyset pagination, so memory stays flat for any history.
+    Only rows with id > after_id are returned.
+    """
+    unknown = [c for c in columns if c not in COLUMNS and c != "id"]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+    if not store_path(path).exists():
+        return
+
+    conn = connect(path, readonly=True)
+    try:
+        last_id = after_id
+        while True:
+            where, params = _where(start_date, end_date, camera, after_id=last_id)
+            rows = conn.execute(
+                f"SELECT id, {', '.join(columns)} FROM observations{where} ORDER BY id LIMIT ?",
+                (*params, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [row[1:] for row in rows]
+    finally:
+        conn.close()
+
+
+def query(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    camera: Optional[str] = None,
+    columns: Sequence[str] = COLUMNS,
+    path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Matching rows as dicts. For large ranges prefer iter_chunks."""
+    return [
+        dict(zip(columns, row))
+        for chunk in iter_chunks(start_date, end_date, camera, columns, path=path)
+        for row in chunk
+    ]
+
+
+def count(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    camera: Optional[str] = None,
+    path: Optional[str] = None,
+) -> int:
+    if not store_path(path).exists():
+        return 0
+    conn = connect(path, readonly=True)
+    try:
+        where, params = _where(start_date, end_date, camera)
+        return conn.execute(f"SELECT COUNT(*) FROM observations{where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def latest_date(
+    camera: Optional[str] = None,
+    after_id: int = 0,
+    path: Optional[str] = None,
+) -> Optional[str]:
+    """Newest observation date (YYYY-MM-DD) among rows with id > after_id."""
+    if not store_path(path).exists():
+        return None
+    conn = connect(path, readonly=True)
+    try:
+        where, params = _where(None, None, camera, after_id=after_id)
+        return conn.execute(f"SELECT MAX(date) FROM observations{where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+# -------------------------
+# Excel export artifact
+# -------------------------
+def export_xlsx(target: Path, path: Optional[str] = None) -> int:
+    """
+    Rewrites `target` from the store with openpyxl's write-only mode
+    (constant memory), then swaps it in atomically. Returns the row count.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("agrivision")
+    ws.append(COLUMNS)
+    rows = 0
+    for chunk in iter_chunks(path=path):
+        for row in chunk:
+            ws.append(["" if v is None else v for v in row])
+        rows += len(chunk)
+    wb.save(tmp)
+    os.replace(tmp, target)
+    return rows
+
+
+def excel_path() -> Optional[Path]:
+    p = read_data_json().get("agrivison_data_path")
+    return Path(p) if isinstance(p, str) and p.strip() else None
+
+
+def checkpoint_key(workbook: Path, sheet: Optional[str] = None) -> str:
+    """meta key holding the last worksheet row imported from `workbook`."""
+    name = Path(workbook).name
+    return f"import:{name}" if sheet is None else f"import:{name}:{sheet}"
+
+
+def export_key(workbook: Path) -> str:
+    """meta key set once the store has written `workbook` as its export."""
+    return f"export:{Path(workbook).name}"
+
+
+def import_done_key(workbook: Path) -> str:
+    """meta key set once `workbook` has been imported to its last row."""
+    return f"imported:{Path(workbook).name}"
+
+
+def legacy_import_done(conn: sqlite3.Connection) -> bool:
+    """
+    Whether the store holds the history of agrivision_data.xlsx from before
+    the store existed: there is no such workbook, it is already our export,
+    or it has been imported completely.
+    """
+    target = excel_path()
+    if target is None or not target.exists():
+        return True
+    return (
+        get_meta(conn, export_key(target)) is not None
+        or get_meta(conn, import_done_key(target)) is not None
+    )
+
+
+def _date_cell(value) -> str:
+    # openpyxl returns real date cells as datetime
+    return value.date().isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _time_cell(value) -> str:
+    return value.strftime("%H:%M:%S") if hasattr(value, "strftime") else str(value)
+
+
+def import_workbook(conn: sqlite3.Connection, workbook: Path, batch_rows: int = 1000) -> int:
+    """
+    Streams an agrivision_data.xlsx-shaped workbook (HEADERS columns, header
+    row first) into the observations table. Each batch commits together with
+    its checkpoint, so an interrupted import resumes where it stopped.
+    Returns the number of rows imported.
+    """
+    if get_meta(conn, export_key(workbook)) is not None:
+        # The workbook is our own export by now; importing it would duplicate rows
+        print(f"[STORE] {workbook} is exported from the store, not importing it")
+        return 0
+
+    key = checkpoint_key(workbook)
+    done_row = int(get_meta(conn, key) or 1)
+
+    wb = load_workbook(workbook, read_only=True, data_only=True)
+    try:
+        imported = 0
+        batch = []
+        last_row = done_row
+
+        def commit(final: bool = False):
+            with conn:
+                conn.executemany(_INSERT, batch)
+                set_meta(conn, key, str(last_row))
+                if final:
+                    set_meta(conn, import_done_key(workbook), datetime.now().isoformat(timespec="seconds"))
+
+        for last_row, row in enumerate(
+            wb.active.iter_rows(min_row=done_row + 1, values_only=True), start=done_row + 1
+        ):
+            values = list(row[:len(COLUMNS)]) + [None] * (len(COLUMNS) - len(row))
+            if not values[0] or not values[2]:
+                continue
+            values = [None if v == "" else v for v in values]
+            values[0], values[1], values[2] = _date_cell(values[0]), _time_cell(values[1]), str(values[2])
+            batch.append(tuple(values))
+            if len(batch) >= batch_rows:
+                commit()
+                imported += len(batch)
+                batch.clear()
+
+        commit(final=True)
+        imported += len(batch)
+        return imported
+    finally:
+        wb.close()
+
+
+# -------------------------
+# Writer
+# -------------------------
+class _Flush:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class ObservationStore:
+    """
+    Batched, non-blocking appends. append() only enqueues; a writer thread
+    inserts whatever has accumulated in one transaction.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._export_thread: Optional[threading.Thread] = None
+        self._written = 0
+        self._failed = 0
+        self._dirty_since_export = False
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="observation-store", daemon=True)
+                self._thread.start()
+                # Exports rewrite the whole history, so they must not hold up inserts
+                self._export_thread = threading.Thread(
+                    target=self._run_export, name="observation-export", daemon=True
+                )
+                self._export_thread.start()
+                atexit.register(self.close)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Queues one observation; keys are COLUMNS."""
+        self._ensure_started()
+        self._queue.put(tuple(row.get(c) for c in COLUMNS))
+
+    def append_many(self, rows: Sequence[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Blocks until everything queued so far is committed."""
+        if self._thread is None:
+            return
+        marker = _Flush()
+        self._queue.put(marker)
+        marker.done.wait(timeout)
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10.0)
+
+    def _run(self) -> None:
+        conn = connect()
+        # Legacy history is imported before the first batch, whatever the export
+        # setting; a failed import (e.g. the workbook is locked) is retried.
+        retry_import_at: Optional[float] = 0.0
+        while True:
+            if retry_import_at is not None and time.monotonic() >= retry_import_at:
+                retry_import_at = None if self._import_legacy(conn) else time.monotonic() + 60.0
+
+            cfg = _settings()
+            batch_size = max(1, int(cfg["batch_size"]))
+            flush_interval = max(0.05, float(cfg["flush_interval"]))
+
+            rows, waiters, stop = [], [], False
+            try:
+                item = self._queue.get(timeout=flush_interval)
+                deadline = time.monotonic() + flush_interval
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    if isinstance(item, _Flush):
+                        waiters.append(item.done)
+                        break
+                    rows.append(item)
+                    if len(rows) >= batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                pass
+
+            if rows:
+                self._insert(conn, rows)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                conn.close()
+                return
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        try:
+            with conn:
+                conn.executemany(_INSERT, rows)
+            with self._lock:
+                self._written += len(rows)
+                self._dirty_since_export = True
+        except sqlite3.Error as e:
+            with self._lock:
+                self._failed += len(rows)
+            print(f"[STORE] Failed inserting {len(rows)} observations: {e}")
+
+    def _run_export(self) -> None:
+        conn = connect()
+        while True:
+            interval = float(_settings()["excel_export_interval"])
+            time.sleep(interval if interval > 0 else 60.0)
+            if interval <= 0:
+                continue
+            with self._lock:
+                dirty = self._dirty_since_export
+            target = excel_path()
+            if not dirty or target is None:
+                continue
+            if not legacy_import_done(conn):
+                print(f"[STORE] {target} is not fully imported yet, not exporting over it")
+                continue
+            with self._lock:
+                self._dirty_since_export = False
+            try:
+                rows = export_xlsx(target)
+                with conn:
+                    set_meta(conn, export_key(target), datetime.now().isoformat(timespec="seconds"))
+                print(f"[STORE] Exported {rows} observations to {target}")
+            except Exception as e:
+                with self._lock:
+                    self._dirty_since_export = True
+                print(f"[STORE] Excel export to {target} failed: {e}")
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> bool:
+        """
+        Imports (or resumes importing) agrivision_data.xlsx rows from before
+        the store existed. Returns False if it has to be retried.
+        """
+        if legacy_import_done(conn):
+            return True
+        target = excel_path()
+        try:
+            imported = import_workbook(conn, target)
+            print(f"[STORE] Imported {imported} rows from {target}")
+            return True
+        except Exception as e:
+            print(f"[STORE] Could not import {target}, retrying later: {e}")
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self._written,
+                "failed": self._failed,
+            }
+
+
+STORE = ObservationStore()
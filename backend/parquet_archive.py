@@ -0,0 +1,330 @@
+# parquet_archive.py
+"""
+Day/camera partitioned Parquet archive of the observation store.
+
+    <archive>/day=2025-07-09/camera=camera1/part-<first id>-<last id>.parquet
+
+compact() rolls finished days out of SQLite into the archive (the store
+keeps them; the archive is the analytics copy). query_frame() reads only
+the partitions and columns a request needs, plus the not-yet-archived tail
+straight from SQLite, so a 7-day one-camera query touches a handful of
+small files instead of the whole history.
+
+Ids do not follow dates (legacy rows are imported after live ones), so the
+archived set is tracked by two meta values: a row is archived when
+id <= LAST_ID_KEY and date < BEFORE_KEY.
+
+Run from the repo root:
+    python backend/parquet_archive.py            # compact now
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+import observation_store
+from dataframe_cache import DF_CACHE
+from observation_store import COLUMNS, get_meta, set_meta
+from runtime_config import get_section
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+PARQUET_ARCHIVE_KEY = "Parquet Archive"
+
+_DEFAULTS = {
+    "path": "backend/Data/archive",
+    "compact_interval": 3600,   # seconds between background compactions; 0 disables
+    "rows_per_pass": 50000,     # rows buffered before part files are written
+}
+
+LAST_ID_KEY = "archive:last_id"
+BEFORE_KEY = "archive:before"   # unset for archives whose rows were all archived by id alone
+
+_INT_COLUMNS = {"disease_status", "health_status"}
+
+
+def _settings() -> dict:
+    return get_section(PARQUET_ARCHIVE_KEY, _DEFAULTS)
+
+
+def archive_root() -> Path:
+    return Path(_settings()["path"])
+
+
+def available() -> bool:
+    """
+    True when pyarrow is installed and there is anything to query. While the
+    legacy workbook is still being imported the store lacks its history, so
+    queries stay on the workbook until the import has finished.
+    """
+    if pa is None:
+        return False
+    if not observation_store.store_path().exists():
+        return any(archive_root().glob("day=*"))
+    conn = observation_store.connect(readonly=True)
+    try:
+        return observation_store.legacy_import_done(conn)
+    finally:
+        conn.close()
+
+
+def _archive_state(conn) -> Tuple[int, Optional[str]]:
+    return int(get_meta(conn, LAST_ID_KEY) or 0), get_meta(conn, BEFORE_KEY)
+
+
+def _schema():
+    return pa.schema([
+        (name, pa.int64() if name in _INT_COLUMNS else pa.string())
+        for name in COLUMNS
+    ])
+
+
+# -------------------------
+# Compaction
+# -------------------------
+def _write_parts(groups: Dict[Tuple[str, str], List[tuple]], root: Path) -> None:
+    schema = _schema()
+    for (day, camera), rows in groups.items():
+        part_dir = root / f"day={day}" / f"camera={camera}"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        ids = [r[0] for r in rows]
+        columns = list(zip(*(r[1:] for r in rows)))
+        table = pa.Table.from_arrays(
+            [pa.array(list(col), type=schema.field(name).type) for name, col in zip(COLUMNS, columns)],
+            schema=schema,
+        )
+        # Same id range -> same name, so a rerun after a crash overwrites instead of duplicating
+        tmp = part_dir / f".part-{ids[0]}-{ids[-1]}.tmp"
+        pq.write_table(table, tmp)
+        tmp.replace(part_dir / f"part-{ids[0]}-{ids[-1]}.parquet")
+
+
+def _select(conn, where: str, params: tuple, chunk_size: int = 5000):
+    """Rows (id first) matching `where`, in id order, keyset-paginated."""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM observations "
+            f"WHERE id > ? AND {where} ORDER BY id LIMIT ?",
+            (last_id, *params, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def compact(path: Optional[str] = None) -> int:
+    """
+    Moves every row of a finished day (before today) that is not archived
+    yet into the archive, whatever its id. Returns the number of rows archived.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    cfg = _settings()
+    root = archive_root()
+    rows_per_pass = max(1000, int(cfg["rows_per_pass"]))
+
+    conn = observation_store.connect(path)
+    try:
+        last_id, before = _archive_state(conn)
+        # Never move the day boundary back, or archived rows would count as pending
+        today = max(date.today().isoformat(), before or "")
+        archived = 0
+        groups: Dict[Tuple[str, str], List[tuple]] = defaultdict(list)
+
+        def add(rows) -> int:
+            for row in rows:
+                groups[(row[1], row[3])].append(row)
+            return len(rows)
+
+        # 1) Rows at or below last_id on days that finished since the last pass
+        #    (e.g. yesterday's rows that were live when it ran); about a day's worth.
+        if before is not None and before < today:
+            for rows in _select(conn, "id <= ? AND date >= ? AND date < ?", (last_id, before, today)):
+                archived += add(rows)
+        if groups:
+            _write_parts(groups, root)
+            groups.clear()
+        with conn:
+            set_meta(conn, BEFORE_KEY, today)
+
+        # 2) Newer rows of finished days, in id order; each flush moves last_id up
+        buffered = 0
+        for rows in _select(conn, "id > ? AND date < ?", (last_id, today)):
+            buffered += add(rows)
+            if buffered >= rows_per_pass:
+                _write_parts(groups, root)
+                last_id = rows[-1][0]
+                with conn:
+                    set_meta(conn, LAST_ID_KEY, str(last_id))
+                groups.clear()
+                archived += buffered
+                buffered = 0
+        if buffered:
+            _write_parts(groups, root)
+            last_id = max(r[-1][0] for r in groups.values())
+            archived += buffered
+        with conn:
+            set_meta(conn, LAST_ID_KEY, str(last_id))
+        return archived
+    finally:
+        conn.close()
+
+
+class ArchiveCompactor:
+    """Background thread that runs compact() every `compact_interval` seconds."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if pa is None:
+            print("[ARCHIVE] pyarrow not installed, Parquet archive disabled")
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="archive-compactor", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            interval = float(_settings()["compact_interval"])
+            if interval > 0:
+                try:
+                    rows = compact()
+                    if rows:
+                        print(f"[ARCHIVE] Archived {rows} observations")
+                except Exception as e:
+                    print(f"[ARCHIVE] Compaction failed: {e}")
+            time.sleep(interval if interval > 0 else 60.0)
+
+
+COMPACTOR = ArchiveCompactor()
+
+
+# -------------------------
+# Query layer
+# -------------------------
+def _partition_days(root: Path) -> List[str]:
+    return sorted(p.name[4:] for p in root.glob("day=*") if p.is_dir())
+
+
+def query_frame(
+    days: Optional[int] = None,
+    camera: Optional[str] = None,
+    day: Optional[str] = None,
+    columns: Sequence[str] = COLUMNS,
+    path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Observations for one `day`, or the last `days` days up to the newest
+    observation (like the /agrivision endpoints), optionally for one camera.
+    Only matching day/camera partitions are opened and only `columns`
+    (plus date/time) are read. Adds `timestamp` and `day` columns.
+    """
+    columns = list(dict.fromkeys(["date", "time", *columns]))
+    root = archive_root()
+
+    last_id, before = 0, None
+    if observation_store.store_path(path).exists():
+        conn = observation_store.connect(path, readonly=True)
+        try:
+            last_id, before = _archive_state(conn)
+        finally:
+            conn.close()
+
+    # Partition pruning by directory name: day first, then camera
+    part_days = [
+        d for d in _partition_days(root)
+        if camera is None or (root / f"day={d}" / f"camera={camera}").is_dir()
+    ]
+
+    if day is not None:
+        start_day = end_day = day
+    else:
+        newest = max(
+            [d for d in (part_days[-1] if part_days else None,
+                         observation_store.latest_date(camera, path=path)) if d],
+            default=None,
+        )
+        if newest is None:
+            return _empty(columns)
+        end_day = newest
+        start_day = (date.fromisoformat(newest) - timedelta(days=days)).isoformat() if days else None
+
+    def read_parts() -> pd.DataFrame:
+        tables = []
+        for d in part_days:
+            if (start_day and d < start_day) or d > end_day:
+                continue
+            day_dir = root / f"day={d}"
+            camera_dirs = [day_dir / f"camera={camera}"] if camera else sorted(day_dir.glob("camera=*"))
+            for camera_dir in camera_dirs:
+                for part in sorted(camera_dir.glob("part-*.parquet")):
+                    # Column pruning: only the requested columns are decoded
+                    tables.append(pq.read_table(part, columns=columns))
+        return pa.concat_tables(tables).to_pandas() if tables else pd.DataFrame(columns=columns)
+
+    # Part files only change when a compaction moves the archive state, so
+    # the archived rows of a query are shared until then; the tail is always fresh
+    archived = DF_CACHE.get_versioned(
+        ("archive", str(root), start_day, end_day, camera, tuple(columns)),
+        (last_id, before, tuple(part_days)),
+        read_parts,
+    )
+    frames = [archived] if len(archived) else []
+
+    # Rows not archived yet come straight from SQLite: every row from `before`
+    # on, and rows above last_id on earlier days
+    ranges = []
+    if before is None:
+        ranges.append((start_day, end_day, last_id))
+    else:
+        if before <= end_day:
+            ranges.append((max(start_day or before, before), end_day, 0))
+        day_before = (date.fromisoformat(before) - timedelta(days=1)).isoformat()
+        if start_day is None or start_day <= day_before:
+            ranges.append((start_day, min(end_day, day_before), last_id))
+    tail = [
+        row
+        for first, last, after_id in ranges
+        for chunk in observation_store.iter_chunks(
+            first, last, camera, columns=columns, path=path, after_id=after_id, chunk_size=5000
+        )
+        for row in chunk
+    ]
+    if tail:
+        frames.append(pd.DataFrame.from_records(tail, columns=columns))
+
+    if not frames:
+        return _empty(columns)
+    df = pd.concat(frames, ignore_index=True)
+
+    df["timestamp"] = pd.to_datetime(df["date"].astype(str) + " " + df["time"].astype(str), errors="coerce")
+    df = df.dropna(subset=["timestamp"])
+    df["day"] = df["timestamp"].dt.date.astype(str)
+
+    # Exact "last N days" cut, same as the pandas filter on the full workbook
+    if day is None and days and not df.empty:
+        df = df[df["timestamp"] >= df["timestamp"].max() - pd.Timedelta(days=days)]
+    return df
+
+
+def _empty(columns: Sequence[str]) -> pd.DataFrame:
+    return pd.DataFrame(columns=[*columns, "timestamp", "day"])
+
+
+if __name__ == "__main__":
+    started = datetime.now()
+    count = compact()
+    print(f"[ARCHIVE] Archived {count} observations in {(datetime.now() - started).total_seconds():.1f}s")
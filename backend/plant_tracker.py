@@ -0,0 +1,185 @@
+# plant_tracker.py
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from model_manager import MODELS
+from runtime_config import get_section
+
+PLANT_TRACKING_KEY = "Plant Tracking"
+
+_DEFAULTS = {
+    "enabled": True,
+    "iou_threshold": 0.3,         # min overlap to treat a box as the same plant
+    "max_missed": 5,              # cycles a plant may go undetected before its track is dropped
+    "reclassify_after": 1800.0,   # seconds a cached classification stays valid
+    "change_threshold": 12.0,     # mean abs grey-level diff (0-255) of the crop thumbnail
+}
+
+_CLASSIFIERS = ("Growth", "Health", "Disease")
+_THUMB = 32
+
+
+def _settings() -> dict:
+    return get_section(PLANT_TRACKING_KEY, _DEFAULTS)
+
+
+def _iou(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+
+def _thumbnail(crop: np.ndarray) -> np.ndarray:
+    grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return cv2.resize(grey, (_THUMB, _THUMB), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+class Track:
+    """One plant followed across cycles, with its last classification."""
+
+    __slots__ = ("track_id", "box", "missed", "thumb", "classification", "classified_at")
+
+    def __init__(self, track_id: str, box: Tuple[int, int, int, int]):
+        self.track_id = track_id
+        self.box = box
+        self.missed = 0
+        self.thumb: Optional[np.ndarray] = None
+        self.classification: Optional[dict] = None
+        self.classified_at = 0.0
+
+
+class PlantTracker:
+    """
+    Greedy IoU association of one camera's detections to existing tracks.
+    Plants barely move, so highest-overlap-first matching is enough.
+    """
+
+    def __init__(self, camera: str):
+        self.camera = camera
+        self._tracks: List[Track] = []
+        self._next_id = 1
+
+    def update(self, boxes: List[Tuple[int, int, int, int]], cfg: dict) -> List[Track]:
+        threshold = float(cfg["iou_threshold"])
+        pairs = []
+        for bi, box in enumerate(boxes):
+            for ti, track in enumerate(self._tracks):
+                overlap = _iou(box, track.box)
+                if overlap >= threshold:
+                    pairs.append((overlap, bi, ti))
+        pairs.sort(reverse=True)
+
+        assigned: Dict[int, Track] = {}
+        used_tracks = set()
+        for _, bi, ti in pairs:
+            if bi in assigned or ti in used_tracks:
+                continue
+            assigned[bi] = self._tracks[ti]
+            used_tracks.add(ti)
+
+        # Age out plants that were not seen this cycle
+        max_missed = int(cfg["max_missed"])
+        survivors = []
+        for ti, track in enumerate(self._tracks):
+            if ti in used_tracks:
+                track.missed = 0
+                survivors.append(track)
+            else:
+                track.missed += 1
+                if track.missed <= max_missed:
+                    survivors.append(track)
+        self._tracks = survivors
+
+        result = []
+        for bi, box in enumerate(boxes):
+            track = assigned.get(bi)
+            if track is None:
+                track = Track(f"{self.camera}-{self._next_id}", box)
+                self._next_id += 1
+                self._tracks.append(track)
+            track.box = box
+            result.append(track)
+        return result
+
+    def forget_classifications(self) -> None:
+        for track in self._tracks:
+            track.classification = None
+
+
+class TrackerPool:
+    """
+    Per-camera trackers. Decides which crops actually need the classifiers
+    and remembers their results, so unchanged plants are served from cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trackers: Dict[str, PlantTracker] = {}
+        self._hits = 0
+        self._misses = 0
+        MODELS.add_swap_listener(self._on_model_swap)
+
+    def assign(self, camera: str, bounding_boxes: List[dict]) -> List[Track]:
+        """Returns one Track per box, in order."""
+        boxes = [(int(b["x1"]), int(b["y1"]), int(b["x2"]), int(b["y2"])) for b in bounding_boxes]
+        with self._lock:
+            tracker = self._trackers.get(camera)
+            if tracker is None:
+                tracker = self._trackers[camera] = PlantTracker(camera)
+            return tracker.update(boxes, _settings())
+
+    def cached(self, track: Track, crop: np.ndarray) -> Optional[dict]:
+        """The track's classification if it is still valid for `crop`, else None."""
+        cfg = _settings()
+        with self._lock:
+            if not cfg.get("enabled") or track.classification is None:
+                self._misses += 1
+                return None
+            fresh = time.monotonic() - track.classified_at < float(cfg["reclassify_after"])
+            unchanged = (
+                track.thumb is not None
+                and float(np.abs(_thumbnail(crop) - track.thumb).mean()) <= float(cfg["change_threshold"])
+            )
+            if fresh and unchanged:
+                self._hits += 1
+                return track.classification
+            self._misses += 1
+            return None
+
+    def remember(self, track: Track, crop: np.ndarray, classification: dict) -> None:
+        if "error" in classification:
+            return
+        thumb = _thumbnail(crop)
+        with self._lock:
+            track.thumb = thumb
+            track.classification = classification
+            track.classified_at = time.monotonic()
+
+    def _on_model_swap(self, key: str, version: int) -> None:
+        if key not in _CLASSIFIERS:
+            return
+        with self._lock:
+            for tracker in self._trackers.values():
+                tracker.forget_classifications()
+        print(f"[TRACKER] {key} model v{version} swapped in, cached classifications cleared")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cameras": len(self._trackers),
+                "tracks": sum(len(t._tracks) for t in self._trackers.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+TRACKERS = TrackerPool()
@@ -0,0 +1,113 @@
+# precision_report.py
+"""
+Accuracy drift of the configured classifier precision/backend against fp32,
+measured on crops saved in the camera storage tree.
+
+Run from the repo root:
+    python backend/precision_report.py
+    python backend/precision_report.py --models Growth --backend onnx --precision int8 --limit 500
+"""
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+
+from inference_backends import load_backend_model
+from model_manager import device, file_digest
+from model_precision import calibration_files, preprocess
+from runtime_config import read_data_json
+
+CLASSIFIERS = ("Growth", "Health", "Disease")
+IMGSZ = 224
+BATCH = 32
+
+
+def _probs(model, batches):
+    """Runs every batch through `model`; returns (probs, seconds)."""
+    out = []
+    start = time.perf_counter()
+    for tensor in batches:
+        results = model.predict(source=tensor, imgsz=IMGSZ, device=device, verbose=False)
+        out.extend(r.probs.data.float().cpu().numpy() for r in results)
+    return np.stack(out), time.perf_counter() - start
+
+
+def drift_report(key: str, backend: str, precision: str, limit: int) -> dict:
+    path = read_data_json()["Model"][key]["path"]
+    files = calibration_files(key, limit)
+    images = [cv2.imread(str(f)) for f in files]
+    images = [img for img in images if img is not None]
+    if not images:
+        return {"model": key, "error": "no saved crops found"}
+
+    arrays = np.concatenate([preprocess(img, IMGSZ) for img in images])
+    batches = [torch.from_numpy(arrays[i:i + BATCH]) for i in range(0, len(arrays), BATCH)]
+
+    reference = YOLO(path).to(device)
+    candidate, label = load_backend_model(
+        key, path, file_digest(path), backend, IMGSZ, device, precision
+    )
+
+    # One warm-up batch each so timings exclude lazy initialisation
+    _probs(reference, batches[:1])
+    _probs(candidate, batches[:1])
+
+    ref_probs, ref_secs = _probs(reference, batches)
+    cand_probs, cand_secs = _probs(candidate, batches)
+
+    diff = np.abs(ref_probs - cand_probs)
+    return {
+        "model": key,
+        "requested": f"{backend}/{precision}",
+        "serving": label,
+        "images": len(images),
+        "top1_agreement_pct": float((ref_probs.argmax(1) == cand_probs.argmax(1)).mean() * 100.0),
+        "mean_prob_drift": float(diff.mean()),
+        "max_prob_drift": float(diff.max()),
+        "fp32_images_per_sec": len(images) / ref_secs,
+        "candidate_images_per_sec": len(images) / cand_secs,
+        "speedup": ref_secs / cand_secs if cand_secs > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reduced-precision accuracy drift report")
+    parser.add_argument("--models", nargs="+", default=list(CLASSIFIERS), choices=CLASSIFIERS)
+    parser.add_argument("--backend", help="override Data.json backend for every model")
+    parser.add_argument("--precision", help="override Data.json precision for every model")
+    parser.add_argument("--limit", type=int, default=300, help="max saved crops per model")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    models_cfg = read_data_json().get("Model", {})
+    reports = []
+    for key in args.models:
+        cfg = models_cfg.get(key, {})
+        backend = args.backend or cfg.get("backend", "pytorch")
+        precision = args.precision or cfg.get("precision", "fp32")
+        print(f"[REPORT] {key}: {backend}/{precision} vs pytorch/fp32 ...")
+        reports.append(drift_report(key, backend, precision, args.limit))
+
+    for r in reports:
+        if "error" in r:
+            print(f"{r['model']:<8} {r['error']}")
+            continue
+        print(
+            f"{r['model']:<8} serving={r['serving']:<14} n={r['images']:<5} "
+            f"top1={r['top1_agreement_pct']:6.2f}%  "
+            f"mean|dp|={r['mean_prob_drift']:.4f}  max|dp|={r['max_prob_drift']:.4f}  "
+            f"fp32={r['fp32_images_per_sec']:.1f}/s  cand={r['candidate_images_per_sec']:.1f}/s  "
+            f"x{r['speedup']:.2f}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# rate_limiter.py
+import time
+from typing import Dict, Optional
+
+from runtime_config import get_section
+
+RATE_LIMITS_KEY = "Rate Limits"
+
+_DEFAULTS = {
+    "camera_rate": 0.33,      # requests per second per camera (was a fixed 3 s sleep); 0 = unlimited
+    "camera_burst": 1,
+    "global_rate": 2.0,       # requests per second across all cameras; 0 = unlimited
+    "global_burst": 4,
+    "serve_cached": True,     # answer over-budget detect_classify with the last result
+}
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def configure(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, burst)
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated = max(self.updated, now)
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (call refill first)."""
+        if self.rate <= 0 or self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        if self.rate > 0:
+            self.tokens -= 1.0
+
+
+class RateLimiter:
+    """
+    Token buckets per camera plus one global bucket. A request only goes
+    through when both have a token; otherwise it is turned away at once
+    with a retry-after hint instead of queueing behind a sleep.
+
+    Only used from the websocket event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._global: Optional[TokenBucket] = None
+        self._cameras: Dict[str, TokenBucket] = {}
+        self._admitted = 0
+        self._rejected = 0
+
+    @staticmethod
+    def settings() -> dict:
+        return get_section(RATE_LIMITS_KEY, _DEFAULTS)
+
+    def _bucket(self, current: Optional[TokenBucket], rate: float, burst: float, now: float) -> TokenBucket:
+        if current is None:
+            return TokenBucket(rate, burst, now)
+        current.configure(rate, burst)
+        return current
+
+    def acquire(self, camera: str) -> None:
+        """Takes a token for `camera` or raises RateLimited."""
+        cfg = self.settings()
+        now = time.monotonic()
+
+        self._global = self._bucket(
+            self._global, float(cfg["global_rate"]), max(1.0, float(cfg["global_burst"])), now
+        )
+        camera_bucket = self._cameras[camera] = self._bucket(
+            self._cameras.get(camera), float(cfg["camera_rate"]), max(1.0, float(cfg["camera_burst"])), now
+        )
+
+        self._global.refill(now)
+        camera_bucket.refill(now)
+        wait = max(self._global.wait_time(), camera_bucket.wait_time())
+        if wait > 0:
+            self._rejected += 1
+            raise RateLimited(wait)
+
+        self._global.take()
+        camera_bucket.take()
+        self._admitted += 1
+
+    def stats(self) -> dict:
+        return {"admitted": self._admitted, "rejected": self._rejected}
+
+
+RATE_LIMITS = RateLimiter()
@@ -0,0 +1,161 @@
+# result_hub.py
+import asyncio
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from runtime_config import get_section
+from ws_protocol import Protocol
+
+Listener = Callable[[str, Dict[str, Any]], None]
+
+SUBSCRIPTIONS_KEY = "Subscriptions"
+
+_DEFAULTS = {
+    "max_queue": 2,   # pending results per client before the oldest is dropped
+}
+
+
+class Subscriber:
+    """
+    One websocket client's bounded outbox.
+    When the client falls behind, the oldest (stale) result is dropped
+    so a slow browser never holds up the pipeline.
+    """
+
+    def __init__(self, websoc, protocol: Protocol, max_queue: int):
+        self.websoc = websoc
+        self.protocol = protocol
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self.cameras: Set[str] = set()
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, message) -> None:
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(message)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sender())
+
+    async def _sender(self) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websoc.send(message)
+            except Exception:
+                # Connection is gone; the handler cleans up the subscription
+                return
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class ResultHub:
+    """
+    Holds the latest inference result per camera, notifies listeners and
+    fans results out to subscribed websocket clients.
+
+    Only used from the websocket event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        # (camera, protocol key) -> encoded message, built once per publish
+        self._latest_message: Dict[Tuple[str, str], Any] = {}
+        self._listeners: Set[Listener] = set()
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._camera_urls: Dict[str, str] = {}
+
+    def publish(self, camera: str, payload: Dict[str, Any]) -> None:
+        self._latest[camera] = payload
+        for cache_key in [k for k in self._latest_message if k[0] == camera]:
+            del self._latest_message[cache_key]
+
+        for listener in list(self._listeners):
+            try:
+                listener(camera, payload)
+            except Exception as e:
+                print(f"[RESULTS] Listener failed for {camera}: {e}")
+
+        subscribers = self._subscribers.get(camera)
+        if subscribers:
+            # Serialize once per wire format, share it with every subscriber
+            for subscriber in list(subscribers):
+                subscriber.offer(self._message_for(camera, subscriber.protocol))
+
+    def _message_for(self, camera: str, protocol: Protocol):
+        payload = self._latest.get(camera)
+        if payload is None:
+            return None
+        cache_key = (camera, protocol.key)
+        message = self._latest_message.get(cache_key)
+        if message is None:
+            message = protocol.encode(payload)
+            self._latest_message[cache_key] = message
+        return message
+
+    def latest(self, camera: str) -> Optional[Dict[str, Any]]:
+        return self._latest.get(camera)
+
+    def cameras(self) -> list:
+        return list(self._latest.keys())
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.add(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        self._listeners.discard(listener)
+
+    # -------------------------
+    # Websocket subscriptions
+    # -------------------------
+    def new_subscriber(self, websoc, protocol: Protocol) -> Subscriber:
+        cfg = get_section(SUBSCRIPTIONS_KEY, _DEFAULTS)
+        subscriber = Subscriber(websoc, protocol, int(cfg["max_queue"]))
+        subscriber.start()
+        return subscriber
+
+    def subscribe(self, subscriber: Subscriber, camera: str, hls_url: Optional[str] = None) -> None:
+        self._subscribers.setdefault(camera, set()).add(subscriber)
+        subscriber.cameras.add(camera)
+        if hls_url:
+            self._camera_urls[camera] = hls_url
+
+        # Late joiners get the last result straight away
+        message = self._message_for(camera, subscriber.protocol)
+        if message is not None:
+            subscriber.offer(message)
+
+    def unsubscribe(self, subscriber: Subscriber, camera: str) -> None:
+        subscribers = self._subscribers.get(camera)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[camera]
+        subscriber.cameras.discard(camera)
+
+    def drop_subscriber(self, subscriber: Subscriber) -> None:
+        for camera in list(subscriber.cameras):
+            self.unsubscribe(subscriber, camera)
+        subscriber.close()
+
+    def demanded_urls(self) -> list:
+        """HLS urls of cameras that currently have at least one subscriber."""
+        return [
+            self._camera_urls[camera]
+            for camera in self._subscribers
+            if camera in self._camera_urls
+        ]
+
+    def subscriber_count(self, camera: str) -> int:
+        return len(self._subscribers.get(camera, ()))
+
+
+RESULTS = ResultHub()
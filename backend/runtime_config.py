@@ -0,0 +1,57 @@
+# runtime_config.py
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DATA_JSON_PATH = Path("backend/Data/Data.json")
+
+_CACHE_LOCK = threading.Lock()
+_cached_data: Optional[Dict[str, Any]] = None
+_cached_mtime: Optional[float] = None
+
+
+def read_data_json() -> Dict[str, Any]:
+    """
+    Returns the parsed Data.json, re-reading it only when its mtime changes.
+    Falls back to the last good copy (or {}) if the file is missing/broken.
+    """
+    global _cached_data, _cached_mtime
+
+    try:
+        mtime = DATA_JSON_PATH.stat().st_mtime
+    except OSError:
+        return _cached_data or {}
+
+    with _CACHE_LOCK:
+        if _cached_data is not None and _cached_mtime == mtime:
+            return _cached_data
+
+        try:
+            data = json.loads(DATA_JSON_PATH.read_text(encoding="utf-8"))
+            if not isinstance(data, dict):
+                raise ValueError("Root must be a JSON object.")
+        except Exception as e:
+            print(f"[CONFIG] Failed reading Data.json: {e}")
+            return _cached_data or {}
+
+        _cached_data = data
+        _cached_mtime = mtime
+        return data
+
+
+def get_section(key: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns Data.json[key] merged over `defaults`.
+    Missing or invalid sections simply yield the defaults.
+    """
+    section = read_data_json().get(key)
+    merged = dict(defaults)
+    if isinstance(section, dict):
+        merged.update(section)
+    return merged
+
+
+# Excel_Data.xlsx (DetectionData / SensorData sheets) behind graph_fast_api
+DATA_DIR = "C:/Users/Fadhi Safeer/OneDrive/Documents/GitHub/Agrihub_Dashboard/backend"
+EXCEL_FILE = f"{DATA_DIR}/Excel_Data.xlsx"
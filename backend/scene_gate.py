@@ -0,0 +1,92 @@
+# scene_gate.py
+import threading
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from model_manager import MODELS
+from runtime_config import get_section
+
+SCENE_CHANGE_KEY = "Scene Change"
+
+_DEFAULTS = {
+    "enabled": True,
+    "threshold": 4.0,          # mean abs grey-level diff (0-255) that counts as a change
+    "camera_thresholds": {},   # optional per-camera override, e.g. {"camera2": 6.5}
+    "force_refresh": 60.0,     # seconds; detection runs at least this often regardless
+}
+
+_THUMB_SIZE = (64, 36)   # 16:9, enough to see a person or a moved tray
+
+
+def _settings() -> dict:
+    return get_section(SCENE_CHANGE_KEY, _DEFAULTS)
+
+
+def _thumbnail(frame: np.ndarray) -> np.ndarray:
+    small = cv2.resize(frame, _THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    grey = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+    return cv2.GaussianBlur(grey, (3, 3), 0).astype(np.int16)
+
+
+class _Scene:
+    __slots__ = ("thumb", "boxes", "detected_at")
+
+    def __init__(self, thumb: np.ndarray, boxes: List[dict], detected_at: float):
+        self.thumb = thumb
+        self.boxes = boxes
+        self.detected_at = detected_at
+
+
+class SceneGate:
+    """
+    Skips detection when a camera sees the same scene as the last frame
+    detection actually ran on. Comparing against that frame (not the
+    previous capture) means slow drift still triggers a new pass.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scenes: Dict[str, _Scene] = {}
+        self._skipped = 0
+        self._detected = 0
+        MODELS.add_swap_listener(self._on_model_swap)
+
+    def cached_boxes(self, camera: str, frame: np.ndarray) -> Optional[List[dict]]:
+        """Copies of the last boxes if the scene is unchanged, else None."""
+        cfg = _settings()
+        if not cfg.get("enabled"):
+            return None
+        with self._lock:
+            scene = self._scenes.get(camera)
+        if scene is None or time.monotonic() - scene.detected_at >= float(cfg["force_refresh"]):
+            return None
+
+        overrides = cfg.get("camera_thresholds") or {}
+        threshold = float(overrides.get(camera, cfg["threshold"]))
+        if float(np.abs(_thumbnail(frame) - scene.thumb).mean()) > threshold:
+            return None
+
+        with self._lock:
+            self._skipped += 1
+        return [dict(box) for box in scene.boxes]
+
+    def remember(self, camera: str, frame: np.ndarray, boxes: List[dict]) -> None:
+        scene = _Scene(_thumbnail(frame), [dict(box) for box in boxes], time.monotonic())
+        with self._lock:
+            self._scenes[camera] = scene
+            self._detected += 1
+
+    def _on_model_swap(self, key: str, version: int) -> None:
+        if key == "Detection":
+            with self._lock:
+                self._scenes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"detected": self._detected, "skipped": self._skipped}
+
+
+SCENES = SceneGate()
@@ -30,6 +30,11 @@ TYPE_TO_FILENAME = {
     "Prediction": "lettuce_model.joblib",
 }
 
+# Inference backends the vision server can run a model on (Data.json -> Model.<key>.backend)
+MODEL_BACKENDS = ("pytorch", "onnx", "openvino")
+# Numeric precision per model (Data.json -> Model.<key>.precision)
+MODEL_PRECISIONS = ("fp32", "bf16", "int8")
+
 @router.post("/upload-model")
 async def get_model(
     type: str = Query(...),
@@ -121,8 +126,26 @@ async def update_model_config(payload: Dict[str, Any]):
             raise HTTPException(status_code=400, detail=f"{key}.path must be a non-empty string")
         if "confidence" not in m or not isinstance(m["confidence"], (int, float)):
             raise HTTPException(status_code=400, detail=f"{key}.confidence must be a number")
+        if "backend" in m and m["backend"] not in MODEL_BACKENDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{key}.backend must be one of: {', '.join(MODEL_BACKENDS)}",
+            )
+        if "precision" in m and m["precision"] not in MODEL_PRECISIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{key}.precision must be one of: {', '.join(MODEL_PRECISIONS)}",
+            )
 
     data = _read_data_json()
+
+    # Keep optional per-model settings ("backend", "precision") the client didn't send
+    previous = data.get("Model") if isinstance(data.get("Model"), dict) else {}
+    for key, m in payload.items():
+        old = previous.get(key)
+        if isinstance(old, dict) and isinstance(m, dict):
+            payload[key] = {**old, **m}
+
     data["Model"] = payload
 
     try:
@@ -0,0 +1,80 @@
+# single_flight.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from runtime_config import get_section
+
+REQUEST_COALESCING_KEY = "Request Coalescing"
+
+_DEFAULTS = {
+    "fresh_for": 2.0,   # seconds a finished result is handed to identical requests
+}
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests, keyed e.g. by (url, operation).
+    The first caller starts the work; everyone arriving while it runs, or
+    within `fresh_for` seconds after it finished, gets the same result.
+
+    Only used from the websocket event loop, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._done: Dict[Hashable, Tuple[float, Any]] = {}
+        self._started = 0
+        self._shared = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        admit: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """
+        `admit` is called only when this request would start new work (not
+        when it joins an in-flight or fresh result); it may raise to refuse.
+        """
+        fresh_for = float(get_section(REQUEST_COALESCING_KEY, _DEFAULTS)["fresh_for"])
+        now = time.monotonic()
+
+        done = self._done.get(key)
+        if done is not None:
+            if now - done[0] <= fresh_for:
+                self._shared += 1
+                return done[1]
+            del self._done[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            if admit is not None:
+                admit()
+            task = asyncio.create_task(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+            self._started += 1
+        else:
+            self._shared += 1
+
+        # A caller that goes away must not cancel the work others wait on
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Failures are not cached; the next request tries again
+        if not task.cancelled() and task.exception() is None:
+            self._done[key] = (time.monotonic(), task.result())
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "started": self._started,
+            "shared": self._shared,
+        }
+
+
+FLIGHTS = SingleFlight()
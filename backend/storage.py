@@ -1,24 +1,23 @@
 import os
-import shutil
 import uuid
 from datetime import datetime, timedelta
-import cv2
 import numpy as np
 from classification_mapper import ClassificationMapper
 from pathlib import Path
 from datetime import datetime
 import json
 import threading
-from openpyxl import Workbook, load_workbook
-from typing import Optional
+from typing import Optional, Union
+
+from encoded_image import EncodedCrop, as_encoded
+from image_writer import IMAGE_WRITER, WriteTask
+from observation_store import COLUMNS, STORE, store_path
+from runtime_config import get_section
 
 from pathlib import Path
 
 DATA_JSON_PATH = Path("backend/Data/Data.json")
 
-# Track last save time per camera
-_last_saved_at: dict[str, datetime] = {}
-
 
 def get_timestamp_paths(base_dir):
     now = datetime.now()
@@ -29,34 +28,105 @@ def get_timestamp_paths(base_dir):
     return full_path, now
 
 
+IMAGE_SAVING_KEY = "Image Saving"
+
+_SAVE_DEFAULTS = {
+    "max_per_bucket": 7,     # classified images per camera per bucket
+    "bucket_seconds": 60,    # bucket size (folders are per minute)
+}
+
+
+class _SaveCounter:
+    """
+    In-memory count of classified images saved per (camera, time bucket).
+    Seeded once from the current minute folder on disk; after that the
+    cap check never touches the filesystem.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, int], int] = {}
+        self._seeded_dirs: set[str] = set()
+
+    @staticmethod
+    def _settings() -> tuple[int, int]:
+        cfg = get_section(IMAGE_SAVING_KEY, _SAVE_DEFAULTS)
+        return max(0, int(cfg["max_per_bucket"])), max(1, int(cfg["bucket_seconds"]))
+
+    def _seed(self, base_dir: str, bucket_seconds: int) -> None:
+        # Restart within a minute: count what is already in this minute's folders
+        save_path, now = get_timestamp_paths(base_dir)
+        bucket = int(now.timestamp()) // bucket_seconds
+        if not os.path.isdir(save_path):
+            return
+        for cam in os.listdir(save_path):
+            cam_dir = os.path.join(save_path, cam)
+            if os.path.isdir(cam_dir):
+                count = sum(1 for f in os.listdir(cam_dir) if f.endswith(".jpg"))
+                if count:
+                    self._counts[(cam, bucket)] = count
+
+    def try_reserve(self, cam_num: str, now: datetime, base_dir: str) -> bool:
+        cap, bucket_seconds = self._settings()
+        bucket = int(now.timestamp()) // bucket_seconds
+        key = (str(cam_num), bucket)
+
+        with self._lock:
+            if base_dir not in self._seeded_dirs:
+                self._seeded_dirs.add(base_dir)
+                try:
+                    self._seed(base_dir, bucket_seconds)
+                except OSError as e:
+                    print(f"[STORAGE] Could not seed save counters from {base_dir}: {e}")
+
+            # Expire old buckets
+            for old in [k for k in self._counts if k[1] < bucket]:
+                del self._counts[old]
+
+            count = self._counts.get(key, 0)
+            if count >= cap:
+                return False
+            self._counts[key] = count + 1
+            return True
+
+    def release(self, cam_num: str, now: datetime) -> None:
+        _, bucket_seconds = self._settings()
+        key = (str(cam_num), int(now.timestamp()) // bucket_seconds)
+        with self._lock:
+            if self._counts.get(key, 0) > 0:
+                self._counts[key] -= 1
+
+
+_SAVE_COUNTER = _SaveCounter()
+
+
 def save_frame_locally(
-    frame: np.ndarray,
+    frame: Union[np.ndarray, EncodedCrop],
     cam_num: str,
     classification_results: dict,
     base_dir: str = "C:/Users/Fadhi Safeer/OneDrive/Documents/Internship/Agri hub/STORAGE/camera_storage"
 ) -> None:
     """
     Saves classified crop frame in a timestamped camera folder with structured naming.
+    `frame` may be an EncodedCrop so the JPEG bytes are shared, not re-encoded.
+    The write itself is queued on IMAGE_WRITER; this never touches the disk.
     """
     print(f"[DEBUG] Started Saving classified frame for camera {cam_num}...")
 
     # Check time restriction
     now = datetime.now()
 
+    # Per camera / per minute cap, checked in memory
+    if not _SAVE_COUNTER.try_reserve(cam_num, now, base_dir):
+        print(f"[SKIPPED] Max image count reached for {cam_num} in this time bucket")
+        return
+
     print(f"[DEBUG] Surpassed Saving classified frame for camera {cam_num}...")
     # Get time-based directory structure
     save_path, _ = get_timestamp_paths(base_dir)
 
-    # Create camera-specific directory
+    # Camera-specific directory (created by the writer)
     cam_dir = os.path.join(save_path, str(cam_num))
-    os.makedirs(cam_dir, exist_ok=True)
-    
-    # ✅ Check how many images already exist
-    existing_images = [f for f in os.listdir(cam_dir) if f.endswith('.jpg')]
-    print(existing_images)
-    if len(existing_images) >= 7:
-        print(f"[SKIPPED] Max image count (7) reached for {cam_num} in {cam_dir}")
-        return
 
     # Normalize classification fields
     growth_stage = str(classification_results.get("growth", "unknown")).lower().strip().replace(" ", "_")
@@ -72,20 +142,20 @@ def save_frame_locally(
     filename = f"{cam_num}_{growth_code}_{health_code}_{disease_code}_{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.jpg"
 
     # Save
-    cv2.imwrite(os.path.join(cam_dir, filename), frame)
-    _last_saved_at[cam_num] = now
-
-
-    print(f"[SAVED] Classified image: {filename}")
+    if IMAGE_WRITER.submit(WriteTask(cam_dir, filename, as_encoded(frame))):
+        print(f"[QUEUED] Classified image: {filename}")
+    else:
+        _SAVE_COUNTER.release(cam_num, now)
 
 
 def save_camera_view_frame(
-    frame: np.ndarray,
+    frame: Union[np.ndarray, EncodedCrop],
     cam_num: str,
     base_dir: str = "C:/Users/Fadhi Safeer/OneDrive/Documents/Internship/Agri hub/STORAGE/camera_storage"
 ) -> None:
     """
     Saves the latest camera snapshot in a timestamped camera folder.
+    Queued on IMAGE_WRITER, which clears the old snapshot before writing.
     """
 
     # Check time restriction
@@ -97,70 +167,17 @@ def save_camera_view_frame(
 
     # Camera view folder
     cam_view_dir = os.path.join(save_path, str(cam_num), "camera_view")
-    os.makedirs(cam_view_dir, exist_ok=True)
-
-    # Clean old snapshot(s)
-    clear_directory(cam_view_dir)
 
     # Filename
     filename = f"{cam_num}_{now.strftime('%Y%m%d_%H%M%S')}.jpg"
 
-    # Save
-    cv2.imwrite(os.path.join(cam_view_dir, filename), frame)
+    # Save (replaces the old snapshot(s))
+    IMAGE_WRITER.submit(WriteTask(cam_view_dir, filename, as_encoded(frame), replace_dir=True))
     #print(f"[SAVED] Snapshot: {os.path.join(cam_view_dir, filename)}")
 
 
-def clear_directory(directory_path):
-    """
-    Clears all files and subdirectories from the given path.
-    """
-    if not os.path.exists(directory_path):
-        #print(f"[WARN] Directory '{directory_path}' does not exist.")
-        return 0
-
-    if not os.path.isdir(directory_path):
-        #print(f"[ERROR] '{directory_path}' is not a directory.")
-        return 0
-
-    deleted_count = 0
-    try:
-        for item in os.listdir(directory_path):
-            item_path = os.path.join(directory_path, item)
-            if os.path.isfile(item_path):
-                os.remove(item_path)
-                deleted_count += 1
-            elif os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-                deleted_count += 1
-        return deleted_count
-    except Exception as e:
-        #print(f"[ERROR] Failed to clear directory: {e}")
-        return deleted_count
-
-
-
-_EXCEL_LOCK = threading.Lock()
-
-HEADERS = [
-    "date", "time", "camera_number", "plant_id",
-    "growth", "health", "disease",
-    "disease_status", "health_status",
-]
-
-
-
-def _get_agrivision_excel_path() -> Path:
-    data_path = Path(DATA_JSON_PATH)
-    if not data_path.exists():
-        raise FileNotFoundError(f"Data.json not found: {data_path}")
-
-    data = json.loads(data_path.read_text(encoding="utf-8"))
-
-    p = data.get("agrivison_data_path")
-    if not isinstance(p, str) or not p.strip():
-        raise ValueError("Data.json missing or invalid 'agrivison_data_path'")
-
-    return Path(p)
+# Column order of the observation store and the exported agrivision_data.xlsx
+HEADERS = COLUMNS
 
 
 def append_agrivision_row(
@@ -173,40 +190,22 @@ def append_agrivision_row(
     disease_status: Optional[int] = None,  # 0/1/None
     health_status: Optional[int] = None,   # 0/1/None
 ) -> str:
+    """
+    Records one observation in the SQLite observation store (batched in the
+    background). agrivision_data.xlsx is exported from the store periodically.
+    """
     now = datetime.now()
-    date_str = now.strftime("%Y-%m-%d")
-    time_str = now.strftime("%H:%M:%S")
-
-    excel_path = _get_agrivision_excel_path()
-    excel_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with _EXCEL_LOCK:
-        if excel_path.exists():
-            wb = load_workbook(excel_path)
-            ws = wb.active
-
-            # Ensure headers exist and match
-            if ws.max_row == 0:
-                ws.append(HEADERS)
-            else:
-                first_row = [c.value for c in ws[1]]
-                if first_row != HEADERS:
-                    # overwrite header row
-                    for col, h in enumerate(HEADERS, start=1):
-                        ws.cell(row=1, column=col, value=h)
-        else:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "agrivision"
-            ws.append(HEADERS)
-
-        ws.append([
-            date_str, time_str, camera_number, plant_id,
-            growth, health, disease,
-            "" if disease_status is None else disease_status,
-            "" if health_status is None else health_status,
-        ])
-
-        wb.save(excel_path)
-
-    return str(excel_path)
\ No newline at end of file
+
+    STORE.append({
+        "date": now.strftime("%Y-%m-%d"),
+        "time": now.strftime("%H:%M:%S"),
+        "camera_number": camera_number,
+        "plant_id": plant_id,
+        "growth": growth,
+        "health": health,
+        "disease": disease,
+        "disease_status": disease_status,
+        "health_status": health_status,
+    })
+
+    return str(store_path())
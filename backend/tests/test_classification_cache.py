@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+import classification_cache
+from classification_cache import ClassificationCache
+
+VERSIONS = (1, 1, 1)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    settings = {"enabled": True, "max_entries": 4096, "max_distance": 4}
+    monkeypatch.setattr(classification_cache, "_settings", lambda: dict(settings))
+    return ClassificationCache()
+
+
+def _flip(value: int, bits) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_near_match_found_through_blocks(cache):
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    for i, h in enumerate(hashes):
+        cache.put(h, VERSIONS, {"growth": str(i)})
+
+    target = hashes[1234]
+    assert cache.get(_flip(target, [0, 17, 40, 63]), VERSIONS) == {"growth": "1234"}
+    assert cache.get(_flip(target, [1, 2, 3, 4, 5]), VERSIONS) is None
+    assert cache.get(target, (2, 1, 1)) is None
+
+
+def test_evicted_entries_leave_the_index(cache, monkeypatch):
+    monkeypatch.setattr(classification_cache, "_settings",
+                        lambda: {"enabled": True, "max_entries": 2, "max_distance": 4})
+    cache.put(1, VERSIONS, {"growth": "a"})
+    cache.put(2 << 20, VERSIONS, {"growth": "b"})
+    cache.put(3 << 40, VERSIONS, {"growth": "c"})
+
+    assert cache.get(1, VERSIONS) is None
+    assert all(key[0] != 1 for bucket in cache._index.values() for key in bucket)
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("openpyxl")
+from openpyxl import Workbook, load_workbook
+
+import observation_store
+from excel_import import DETECTION_SHEET, SENSOR_SHEET, load_sheet, refresh_sheet
+
+_DETECTION_HEADER = ["TIMESTAMP", "CAMERA_ID", "PLANT_COUNT", "GROWTH_STAGE (%)", "HEALTH_STATUS (%)", "DISEASE_STATUS (%)"]
+_SENSOR_HEADER = ["TIMESTAMP", "TEMP (°C)", "PH"]
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    settings = {"path": str(tmp_path / "observations.db"), "batch_size": 200,
+                "flush_interval": 0.05, "excel_export_interval": 0}
+    monkeypatch.setattr(observation_store, "_settings", lambda: dict(settings))
+
+    path = tmp_path / "Excel_Data.xlsx"
+    wb = Workbook()
+    detection = wb.active
+    detection.title = DETECTION_SHEET
+    detection.append(_DETECTION_HEADER)
+    detection.append(["2025-07-01 09:00:00", 1, 12, "early growth: 40%, leafy growth: 60%", "fully nutritional: 100%", "healthy: 100%"])
+    detection.append(["2025-07-02 09:00:00", 2, 9, "leafy growth: 100%", "k deficient: 30%, fully nutritional: 70%", "viral: 10%, healthy: 90%"])
+    sensor = wb.create_sheet(SENSOR_SHEET)
+    sensor.append(_SENSOR_HEADER)
+    sensor.append(["2025-07-01 09:00:00", 21.5, 6.1])
+    wb.save(path)
+    return path
+
+
+def _append(path, sheet, row):
+    wb = load_workbook(path)
+    wb[sheet].append(row)
+    wb.save(path)
+    # Same-second saves must still look changed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_only_requested_columns_are_loaded(workbook):
+    refresh_sheet(workbook, DETECTION_SHEET)
+    df = load_sheet(DETECTION_SHEET, ["CAMERA_ID", "GROWTH_STAGE (%)"])
+
+    assert list(df.columns) == ["TIMESTAMP", "CAMERA_ID", "GROWTH_STAGE (%)"]
+    assert df["GROWTH_STAGE (%)"].tolist() == [
+        {"early growth": 40.0, "leafy growth": 60.0},
+        {"leafy growth": 100.0},
+    ]
+
+
+def test_all_columns_keep_their_types(workbook):
+    refresh_sheet(workbook, SENSOR_SHEET)
+    df = load_sheet(SENSOR_SHEET)
+    assert list(df.columns) == _SENSOR_HEADER
+    assert df["TEMP (°C)"].tolist() == [21.5]
+
+
+def test_camera_filter_runs_in_sql(workbook):
+    refresh_sheet(workbook, DETECTION_SHEET)
+    df = load_sheet(DETECTION_SHEET, ["HEALTH_STATUS (%)"], camera="2")
+    assert df["HEALTH_STATUS (%)"].tolist() == [{"k deficient": 30.0, "fully nutritional": 70.0}]
+
+
+def test_rows_appended_to_the_workbook_are_picked_up(workbook):
+    refresh_sheet(workbook, DETECTION_SHEET)
+    assert len(load_sheet(DETECTION_SHEET, ["PLANT_COUNT"])) == 2
+
+    _append(workbook, DETECTION_SHEET, ["2025-07-03 09:00:00", 1, 14, "harvest stage: 100%", "", ""])
+    refresh_sheet(workbook, DETECTION_SHEET)
+    df = load_sheet(DETECTION_SHEET, ["PLANT_COUNT"])
+    assert df["PLANT_COUNT"].tolist() == [12, 9, 14]
+
+    # Unchanged workbook: nothing is imported twice
+    refresh_sheet(workbook, DETECTION_SHEET)
+    assert len(load_sheet(DETECTION_SHEET, ["PLANT_COUNT"])) == 3
+
+
+def test_not_imported_sheet_is_none(workbook):
+    assert load_sheet(SENSOR_SHEET) is None
@@ -0,0 +1,41 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import image_writer
+from image_writer import ImageWriter, WriteTask
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    settings = {"workers": 4, "max_queue": 400, "batch_size": 1}
+    monkeypatch.setattr(image_writer, "get_section", lambda key, defaults: dict(settings))
+    return ImageWriter()
+
+
+def _task(directory, name, replace_dir=False):
+    return WriteTask(str(directory), name, SimpleNamespace(jpeg=name.encode()), replace_dir=replace_dir)
+
+
+def test_snapshots_of_one_directory_are_written_in_order(writer, tmp_path):
+    view = tmp_path / "camera1" / "camera_view"
+    for i in range(50):
+        assert writer.submit(_task(view, f"snapshot_{i:02d}.jpg", replace_dir=True))
+    writer.join()
+
+    assert os.listdir(view) == ["snapshot_49.jpg"]
+    assert writer.stats()["failed"] == 0
+
+
+def test_vanished_directory_is_recreated(writer, tmp_path):
+    folder = tmp_path / "camera1" / "2025-07-10_09"
+    writer.submit(_task(folder, "a.jpg"))
+    writer.join()
+    for name in os.listdir(folder):
+        os.remove(folder / name)
+    os.rmdir(folder)
+
+    writer.submit(_task(folder, "b.jpg"))
+    writer.join()
+    assert os.listdir(folder) == ["b.jpg"]
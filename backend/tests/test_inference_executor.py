@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import pytest
+
+import inference_executor
+from inference_executor import InferenceExecutor, InferenceQueueFull
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(inference_executor, "get_section",
+                        lambda key, defaults: {"workers": 1, "max_queue": 1})
+    executor = InferenceExecutor()
+    yield executor
+    executor.shutdown()
+
+
+async def _until(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_cancelled_callers_release_their_slots(executor):
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "never"))
+        await _until(lambda: executor.stats()["pending"] == 2)
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(lambda: None)
+
+        # Not started yet: cancelling frees the slot at once
+        queued.cancel()
+        await _until(lambda: executor.stats()["pending"] == 1)
+
+        # Started: the slot stays taken until the work really ends
+        running.cancel()
+        await asyncio.sleep(0.05)
+        assert executor.stats()["pending"] == 1
+        release.set()
+        await _until(lambda: executor.stats()["pending"] == 0)
+
+        assert await executor.run(lambda: 42) == 42
+        assert executor.stats()["pending"] == 0
+
+    asyncio.run(main())
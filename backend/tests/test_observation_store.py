@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("openpyxl")
+from openpyxl import Workbook
+
+import observation_store
+from observation_store import COLUMNS, ObservationStore
+
+
+def _legacy_workbook(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(COLUMNS)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+@pytest.fixture
+def store_env(tmp_path, monkeypatch):
+    workbook = tmp_path / "agrivision_data.xlsx"
+    settings = {
+        "path": str(tmp_path / "observations.db"),
+        "batch_size": 200,
+        "flush_interval": 0.05,
+        "excel_export_interval": 0,
+    }
+    monkeypatch.setattr(observation_store, "_settings", lambda: dict(settings))
+    monkeypatch.setattr(observation_store, "excel_path", lambda: workbook)
+    return workbook
+
+
+def _live_row(plant_id):
+    return {"date": "2025-07-10", "time": "08:00:00", "camera_number": "camera1", "plant_id": plant_id}
+
+
+def test_legacy_workbook_is_imported_with_export_disabled(store_env):
+    _legacy_workbook(store_env, [
+        ["2025-07-01", "09:00:00", "camera1", "p1", "ok", "ok", "none", 0, 1],
+        ["2025-07-02", "09:00:00", "camera2", "p2", "ok", "ok", "none", 0, 1],
+    ])
+    store = ObservationStore()
+    store.append(_live_row("p3"))
+    store.flush()
+    store.close()
+
+    assert [r["plant_id"] for r in observation_store.query()] == ["p1", "p2", "p3"]
+    conn = observation_store.connect()
+    try:
+        assert observation_store.legacy_import_done(conn)
+    finally:
+        conn.close()
+
+
+def test_import_is_not_done_until_the_workbook_is_read(store_env):
+    _legacy_workbook(store_env, [["2025-07-01", "09:00:00", "camera1", "p1", "", "", "", 0, 1]])
+    conn = observation_store.connect()
+    try:
+        assert not observation_store.legacy_import_done(conn)
+        assert observation_store.import_workbook(conn, store_env) == 1
+        assert observation_store.legacy_import_done(conn)
+        # Resuming from the checkpoint does not duplicate rows
+        assert observation_store.import_workbook(conn, store_env) == 0
+    finally:
+        conn.close()
+    assert observation_store.count() == 1
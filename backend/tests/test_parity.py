@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+import inference_backends
+from model_precision import AutocastModel
+
+IMGSZ = 8
+
+
+class _FakeClassifier:
+    """predict() returns Results-like objects; a Linear layer makes autocast output bf16."""
+
+    def __init__(self):
+        torch.manual_seed(0)
+        self.layer = torch.nn.Linear(3 * IMGSZ * IMGSZ, 4)
+
+    def predict(self, source, **kwargs):
+        with torch.no_grad():
+            probs = self.layer(source.reshape(len(source), -1))
+        return [SimpleNamespace(probs=SimpleNamespace(data=p)) for p in probs]
+
+
+class _FakeDetector:
+    def __init__(self):
+        torch.manual_seed(0)
+        self.layer = torch.nn.Linear(3, 6)
+
+    def predict(self, source, **kwargs):
+        pixels = torch.from_numpy(source.reshape(-1, 3)[:2].astype(np.float32))
+        with torch.no_grad():
+            boxes = self.layer(pixels).abs()
+        return [SimpleNamespace(boxes=SimpleNamespace(data=boxes))]
+
+
+def test_classifier_parity_accepts_bf16_outputs(monkeypatch):
+    crops = torch.rand(2, 3, IMGSZ, IMGSZ)
+    monkeypatch.setattr(inference_backends, "_classifier_parity_input", lambda key, imgsz: crops)
+    model = _FakeClassifier()
+    candidate = AutocastModel(model)
+    source = torch.rand(1, 3, IMGSZ, IMGSZ)
+    assert candidate.predict(source)[0].probs.data.dtype == torch.bfloat16
+
+    error = inference_backends.parity_error("Growth", model, candidate, IMGSZ, "cpu")
+    assert 0.0 <= error < 0.1
+
+
+def test_detector_parity_accepts_bf16_outputs(monkeypatch):
+    frame = np.random.default_rng(0).integers(0, 256, size=(IMGSZ, IMGSZ, 3), dtype=np.uint8)
+    monkeypatch.setattr(inference_backends, "_detection_parity_inputs", lambda: [frame])
+    model = _FakeDetector()
+
+    error = inference_backends.parity_error("Detection", model, AutocastModel(model), IMGSZ, "cpu")
+    assert np.isfinite(error)
@@ -0,0 +1,106 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("openpyxl")
+
+import observation_store
+import parquet_archive
+
+
+class _Today(date):
+    current = date(2025, 7, 10)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def archive_env(tmp_path, monkeypatch):
+    store = {"path": str(tmp_path / "observations.db"), "batch_size": 200,
+             "flush_interval": 0.05, "excel_export_interval": 0}
+    archive = {"path": str(tmp_path / "archive"), "compact_interval": 0, "rows_per_pass": 1000}
+    monkeypatch.setattr(observation_store, "_settings", lambda: dict(store))
+    monkeypatch.setattr(observation_store, "excel_path", lambda: None)
+    monkeypatch.setattr(parquet_archive, "_settings", lambda: dict(archive))
+    monkeypatch.setattr(parquet_archive, "date", _Today)
+    _Today.current = date(2025, 7, 10)
+
+
+def _insert(*days):
+    conn = observation_store.connect()
+    try:
+        with conn:
+            conn.executemany(
+                observation_store._INSERT,
+                [(d, "09:00:00", "camera1", f"p{i}", "", "", "", 0, 1) for i, d in enumerate(days)],
+            )
+    finally:
+        conn.close()
+
+
+def _days():
+    return sorted(parquet_archive.query_frame(days=30)["date"])
+
+
+def test_legacy_rows_behind_a_live_row_are_archived(archive_env):
+    _insert("2025-07-10")                       # live row first
+    _insert("2025-07-01", "2025-07-02")         # legacy import afterwards
+    assert parquet_archive.compact() == 2
+    assert _days() == ["2025-07-01", "2025-07-02", "2025-07-10"]
+
+    _insert("2025-07-03")                       # a late legacy row
+    assert parquet_archive.compact() == 1
+    assert _days() == ["2025-07-01", "2025-07-02", "2025-07-03", "2025-07-10"]
+
+
+def test_yesterdays_live_rows_are_archived_the_next_day(archive_env):
+    _insert("2025-07-09", "2025-07-10")
+    assert parquet_archive.compact() == 1
+    _insert("2025-07-10")
+
+    _Today.current = date(2025, 7, 11)
+    assert parquet_archive.compact() == 2
+    assert parquet_archive.compact() == 0
+    assert _days() == ["2025-07-09", "2025-07-10", "2025-07-10"]
+
+
+def test_not_available_until_legacy_import_finishes(archive_env, tmp_path, monkeypatch):
+    from openpyxl import Workbook
+
+    workbook = tmp_path / "agrivision_data.xlsx"
+    wb = Workbook()
+    wb.active.append(observation_store.COLUMNS)
+    wb.active.append(["2025-07-01", "09:00:00", "camera1", "p1", "", "", "", 0, 1])
+    wb.save(workbook)
+    monkeypatch.setattr(observation_store, "excel_path", lambda: workbook)
+
+    _insert("2025-07-10")
+    assert not parquet_archive.available()
+
+    conn = observation_store.connect()
+    try:
+        observation_store.import_workbook(conn, workbook)
+    finally:
+        conn.close()
+    assert parquet_archive.available()
+
+
+def test_archived_rows_are_cached_until_the_next_compaction(archive_env):
+    from dataframe_cache import DF_CACHE
+
+    _insert("2025-07-01", "2025-07-10")
+    parquet_archive.compact()
+    loads = DF_CACHE.stats()["loads"]
+
+    assert _days() == ["2025-07-01", "2025-07-10"]
+    _insert("2025-07-10")                       # live rows are read fresh every time
+    assert _days() == ["2025-07-01", "2025-07-10", "2025-07-10"]
+    assert DF_CACHE.stats()["loads"] == loads + 1
+
+    _insert("2025-07-02")
+    parquet_archive.compact()
+    assert _days() == ["2025-07-01", "2025-07-02", "2025-07-10", "2025-07-10"]
+    assert DF_CACHE.stats()["loads"] == loads + 2
@@ -0,0 +1,39 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimited, RateLimiter
+
+_SETTINGS = {
+    "camera_rate": 0.33,
+    "camera_burst": 1,
+    "global_rate": 2.0,
+    "global_burst": 4,
+    "serve_cached": True,
+}
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(RateLimiter, "settings", staticmethod(lambda: dict(_SETTINGS)))
+    return RateLimiter()
+
+
+def test_fresh_cameras_are_admitted(limiter):
+    for camera in ("camera1", "camera2", "camera3"):
+        limiter.acquire(camera)
+    assert limiter.stats() == {"admitted": 3, "rejected": 0}
+
+
+def test_second_request_within_budget_is_rejected(limiter):
+    limiter.acquire("camera1")
+    with pytest.raises(RateLimited) as exc:
+        limiter.acquire("camera1")
+    assert exc.value.retry_after > 2.0
+
+
+def test_bucket_refills_over_time(limiter, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "monotonic", lambda: clock[0])
+    limiter.acquire("camera1")
+    clock[0] += 3.1
+    limiter.acquire("camera1")
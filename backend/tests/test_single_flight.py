@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import single_flight
+from rate_limiter import RateLimited
+from single_flight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def fresh_window(monkeypatch):
+    monkeypatch.setattr(single_flight, "get_section", lambda key, defaults: {"fresh_for": 2.0})
+
+
+def test_concurrent_callers_join_without_being_admitted():
+    flights = SingleFlight()
+    admitted = []
+
+    def admit():
+        # Budget for exactly one computation
+        if admitted:
+            raise RateLimited(3.0)
+        admitted.append(True)
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "boxes"
+
+    async def main():
+        return await asyncio.gather(
+            flights.do("camera1", work, admit=admit),
+            flights.do("camera1", work, admit=admit),
+        )
+
+    assert asyncio.run(main()) == ["boxes", "boxes"]
+    assert len(admitted) == 1
+    assert flights.stats()["shared"] == 1
+
+
+def test_refused_admission_starts_nothing():
+    flights = SingleFlight()
+
+    def admit():
+        raise RateLimited(1.0)
+
+    async def work():
+        raise AssertionError("must not run")
+
+    with pytest.raises(RateLimited):
+        asyncio.run(flights.do("camera1", work, admit=admit))
+    assert flights.stats()["started"] == 0
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("cv2")
+websockets = pytest.importorskip("websockets")
+from websockets.extensions.permessage_deflate import PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+from ws_protocol import TextOnlyDeflate, server_extensions
+
+
+def _pair():
+    sender = TextOnlyDeflate(False, False, 12, 12, {"memLevel": 5})
+    receiver = PerMessageDeflate(False, False, 12, 12)
+    return sender, receiver
+
+
+def test_binary_frames_are_not_deflated():
+    sender, receiver = _pair()
+    jpeg = bytes(range(256)) * 40
+
+    text = sender.encode(Frame(Opcode.TEXT, b'{"cropped_image": "' + b"A" * 4000 + b'"}'))
+    binary = sender.encode(Frame(Opcode.BINARY, jpeg))
+    text_again = sender.encode(Frame(Opcode.TEXT, b'{"ok": true}' * 50))
+
+    assert text.rsv1 and len(text.data) < 4000
+    assert not binary.rsv1 and binary.data == jpeg
+    # Skipping a message leaves the shared compression context intact
+    decoded = [receiver.decode(frame).data for frame in (text, binary, text_again)]
+    assert decoded[1] == jpeg
+    assert decoded[2] == b'{"ok": true}' * 50
+
+
+def test_server_negotiates_deflate_and_round_trips():
+    payload_text = "x" * 5000
+    payload_binary = bytes(range(256)) * 20
+
+    async def echo(ws):
+        async for message in ws:
+            await ws.send(message)
+
+    async def run():
+        async with websockets.serve(echo, "localhost", 0, compression=None, extensions=server_extensions()) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://localhost:{port}") as client:
+                assert any(isinstance(e, PerMessageDeflate) for e in client.protocol.extensions)
+                await client.send(payload_text)
+                assert await client.recv() == payload_text
+                await client.send(payload_binary)
+                assert await client.recv() == payload_binary
+
+    asyncio.run(run())
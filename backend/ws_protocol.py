@@ -0,0 +1,195 @@
+# ws_protocol.py
+"""
+Websocket response encoding.
+
+JSON (default, what existing clients get):
+    text frames, crops as base64 strings in "cropped_image".
+
+Binary (negotiated with {"type": "hello", "protocol": "binary", "encoding": "msgpack" | "cbor"}):
+    one binary frame per response:
+
+        byte  0      version (1)
+        byte  1      flags: bit0 = header is zlib-deflated, bit1 = header is CBOR (else msgpack)
+        bytes 2..5   header length, uint32 big-endian
+        header       {"body": <the JSON-mode response, with every "cropped_image"
+                     replaced by an index into "images">, "images": [jpeg lengths]}
+        payload      raw JPEG bytes back to back, in "images" order
+
+    Responses without crops (detection-only boxes, hello/subscribe replies,
+    errors) stay JSON text frames in both modes.
+
+    Only the header is deflated (when it is large enough); JPEG bytes are sent
+    as-is. permessage-deflate stays on for JSON text frames (base64 still
+    shrinks), but binary frames are sent uncompressed (see server_extensions()),
+    so JPEGs are never compressed a second time.
+"""
+import json
+import struct
+import zlib
+from typing import Any, List, Optional
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CTRL_OPCODES, Opcode
+
+from encoded_image import EncodedCrop
+from runtime_config import get_section
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # optional dependency
+    cbor2 = None
+
+JSON = "json"
+BINARY = "binary"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+
+WS_PROTOCOL_KEY = "Websocket Protocol"
+
+_DEFAULTS = {
+    "deflate_header_over": 512,   # bytes; smaller headers are sent uncompressed
+}
+
+_VERSION = 1
+_FLAG_DEFLATED = 0x01
+_FLAG_CBOR = 0x02
+
+
+def available_encodings() -> List[str]:
+    encodings = []
+    if msgpack is not None:
+        encodings.append(MSGPACK)
+    if cbor2 is not None:
+        encodings.append(CBOR)
+    return encodings
+
+
+class Protocol:
+    """Per-connection wire format, JSON unless the client negotiates binary."""
+
+    def __init__(self, mode: str = JSON, encoding: Optional[str] = None):
+        self.mode = mode
+        self.encoding = encoding
+
+    @property
+    def key(self) -> str:
+        return self.mode if self.mode == JSON else f"{self.mode}/{self.encoding}"
+
+    def negotiate(self, data: dict) -> dict:
+        """Handles a hello message; returns the reply describing what was chosen."""
+        encodings = available_encodings()
+        wanted = data.get("encoding")
+
+        if data.get("protocol") == BINARY and encodings:
+            self.mode = BINARY
+            self.encoding = wanted if wanted in encodings else encodings[0]
+        else:
+            self.mode = JSON
+            self.encoding = None
+
+        reply = {"type": "hello", "protocol": self.mode}
+        if self.encoding:
+            reply["encoding"] = self.encoding
+        return reply
+
+    def encode(self, payload: Any, indent: Optional[int] = None):
+        if self.mode == BINARY:
+            return encode_binary(payload, self.encoding)
+        return encode_json(payload, indent=indent)
+
+
+def _json_default(obj):
+    if isinstance(obj, EncodedCrop):
+        return obj.base64
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(payload: Any, indent: Optional[int] = None) -> str:
+    if indent is None:
+        return json.dumps(payload, default=_json_default, separators=(",", ":"))
+    return json.dumps(payload, default=_json_default, indent=indent)
+
+
+def _extract_images(obj, images: List[bytes]):
+    """Copy of `obj` with EncodedCrops swapped for indices into `images`."""
+    if isinstance(obj, EncodedCrop):
+        images.append(obj.jpeg)
+        return len(images) - 1
+    if isinstance(obj, dict):
+        return {k: _extract_images(v, images) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_extract_images(v, images) for v in obj]
+    return obj
+
+
+def encode_binary(payload: Any, encoding: str) -> bytes:
+    images: List[bytes] = []
+    body = _extract_images(payload, images)
+    header_obj = {"body": body, "images": [len(img) for img in images]}
+
+    flags = 0
+    if encoding == CBOR:
+        header = cbor2.dumps(header_obj)
+        flags |= _FLAG_CBOR
+    else:
+        header = msgpack.packb(header_obj, use_bin_type=True)
+
+    threshold = int(get_section(WS_PROTOCOL_KEY, _DEFAULTS)["deflate_header_over"])
+    if len(header) > threshold:
+        header = zlib.compress(header)
+        flags |= _FLAG_DEFLATED
+
+    return b"".join([struct.pack("!BBI", _VERSION, flags, len(header)), header, *images])
+
+
+# -------------------------
+# permessage-deflate
+# -------------------------
+class TextOnlyDeflate(PerMessageDeflate):
+    """
+    permessage-deflate that compresses text messages only. RFC 7692 lets the
+    sender leave any message uncompressed (RSV1 unset), so binary frames,
+    which are mostly JPEG bytes, skip zlib without renegotiating anything.
+    """
+
+    _skipping = False
+
+    def encode(self, frame):
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not Opcode.CONT:
+            self._skipping = frame.opcode is Opcode.BINARY
+        if self._skipping:
+            return frame
+        return super().encode(frame)
+
+
+class _TextOnlyDeflateFactory(ServerPerMessageDeflateFactory):
+    def process_request_params(self, params, accepted_extensions):
+        response_params, ext = super().process_request_params(params, accepted_extensions)
+        return response_params, TextOnlyDeflate(
+            ext.remote_no_context_takeover,
+            ext.local_no_context_takeover,
+            ext.remote_max_window_bits,
+            ext.local_max_window_bits,
+            ext.compress_settings,
+        )
+
+
+def server_extensions() -> list:
+    """
+    For websockets.serve(..., compression=None, extensions=server_extensions()):
+    the library's default deflate settings, minus compressing binary frames.
+    """
+    return [
+        _TextOnlyDeflateFactory(
+            server_max_window_bits=12,
+            client_max_window_bits=12,
+            compress_settings={"memLevel": 5},
+        )
+    ]
@@ -2,12 +2,25 @@ import asyncio
 from zoneinfo import ZoneInfo
 import cv2
 import json
-import base64
-from ultralytics import YOLO
+import numpy as np
 import torch
 from email_alerts import send_disease_alert_email
 from storage import save_camera_view_frame, save_frame_locally, append_agrivision_row
 from classification_mapper import ClassificationMapper
+from frame_grabber import GRABBERS
+from frame_cache import FRAMES
+from encoded_image import EncodedCrop, as_encoded
+from ws_protocol import Protocol
+from result_hub import RESULTS
+from runtime_config import get_section
+from inference_executor import INFERENCE, InferenceQueueFull
+from model_manager import MODELS, device
+from plant_tracker import TRACKERS
+from classification_cache import CLASSIFICATION_CACHE, CLASSIFIERS, dhash
+from scene_gate import SCENES
+from single_flight import FLIGHTS
+from rate_limiter import RATE_LIMITS, RateLimited
+from detection_roi import region_for
 from datetime import datetime
 from pathlib import Path
 
@@ -32,90 +45,37 @@ def _read_data_json() -> dict:
     return data
 
 
-def _get_model_path_conf(data: dict, key: str):
-    cfg = data["Model"][key]
-    return cfg["path"], float(cfg["confidence"])
-
-
-def _get_image_folder(data: dict) -> str:
-    return data["Image Folder"]["path"]
-
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-
-class ModelManager:
-    def __init__(self):
-        self._last_mtime = None
-        self.detection_model = None
-        self.health_model = None
-        self.growth_model = None
-        self.disease_model = None
-        self.det_conf = 0.6
-        self.health_conf = 0.85
-        self.growth_conf = 0.8
-        self.disease_conf = 0.85
-        self.image_folder = "backend/Images/"
-
-    def ensure_loaded(self):
-        mtime = DATA_JSON_PATH.stat().st_mtime
-        if self._last_mtime == mtime and self.detection_model is not None:
-            return
-
-        data = _read_data_json()
-
-        det_path, self.det_conf = _get_model_path_conf(data, "Detection")
-        gro_path, self.growth_conf = _get_model_path_conf(data, "Growth")
-        hea_path, self.health_conf = _get_model_path_conf(data, "Health")
-        dis_path, self.disease_conf = _get_model_path_conf(data, "Disease")
-
-        self.image_folder = _get_image_folder(data)
-
-        self.detection_model = YOLO(det_path)
-        self.growth_model = YOLO(gro_path).to(device)
-        self.health_model = YOLO(hea_path).to(device)
-        self.disease_model = YOLO(dis_path).to(device)
-
-        self._last_mtime = mtime
-
-
-MODELS = ModelManager()
-
-
 # Function to capture a frame from the HLS stream
 async def capture_frame_from_hls(hls_url):
-    cap = cv2.VideoCapture(hls_url)
+    # Fast path: the camera's background reader already holds a fresh frame
+    frame = GRABBERS.peek(hls_url)
+    if frame is not None:
+        return frame
 
-    if not cap.isOpened():
-        raise Exception(f"Failed to open HLS stream from {hls_url}")
-    ret, frame = cap.read()
-    cap.release()
-    if not ret:
-        raise Exception("Failed to capture frame from HLS stream")
-
-    return frame
+    # First request for this camera (or stream stalled): wait off the loop
+    return await asyncio.to_thread(GRABBERS.get_frame, hls_url)
 
 
 async def get_cam_num(hls_url):
     return hls_url.split("/")[-1].split(".")[0]
 
 
-# Existing YOLO detection process (Step 1)
-async def yolo_detection(hls_url):
-    # Time Interval
-    await asyncio.sleep(3)
-    frame = await capture_frame_from_hls(hls_url)
-    save_camera_view_frame(frame, await get_cam_num(hls_url))
-
+def detect_boxes(frame, camera=None):
+    """
+    Blocking detection pass over one frame. Runs on the inference executor.
+    Only the camera's configured ROI is fed to the detector; boxes are
+    returned in full-frame coordinates.
+    """
     # YOLO prediction with threshold moved to model
     MODELS.ensure_loaded()
-    model = MODELS.detection_model
+    model, det_conf = MODELS.detection_model, MODELS.det_conf
+    region = region_for(camera, frame.shape)
 
     results = model.predict(
-        source=frame,
-        imgsz=640,
+        source=region.source(frame),
+        imgsz=region.imgsz,
         device=device,
-        conf=MODELS.det_conf,
+        conf=det_conf,
         verbose=False,
     )
 
@@ -144,6 +104,11 @@ async def yolo_detection(hls_url):
             # Draw rectangle on image (BGR: green)
             cv2.rectangle(img_array, (x1, y1), (x2, y2), (0, 255, 0), 2)
 
+            # ROI-relative -> full-frame coordinates
+            x1, y1, x2, y2 = region.to_frame(x1, y1, x2, y2)
+            if not region.contains(x1, y1, x2, y2):
+                continue
+
             bounding_box = {
                 "x1": x1,
                 "y1": y1,
@@ -153,6 +118,41 @@ async def yolo_detection(hls_url):
             }
             bounding_boxes.append(bounding_box)
 
+    return bounding_boxes
+
+
+async def _detect(hls_url):
+    """
+    Captures a frame, runs detection and caches the frame.
+    Returns (frame, frame_id, bounding_boxes).
+    """
+    frame = await capture_frame_from_hls(hls_url)
+    cam_num = await get_cam_num(hls_url)
+    save_camera_view_frame(frame, cam_num)
+
+    # Static scene: reuse the boxes from the last detection pass
+    bounding_boxes = SCENES.cached_boxes(cam_num, frame)
+    if bounding_boxes is None:
+        bounding_boxes = await INFERENCE.run(detect_boxes, frame, cam_num)
+        SCENES.remember(cam_num, frame, bounding_boxes)
+
+    # Tag every box with the frame it came from; clients echo the boxes back
+    # in step 2, so classification can crop from this exact frame.
+    frame_id = FRAMES.put(frame, hls_url)
+    for box in bounding_boxes:
+        box["frame_id"] = frame_id
+
+    return frame, frame_id, bounding_boxes
+
+
+# Existing YOLO detection process (Step 1)
+async def yolo_detection(hls_url):
+    # Joining an in-flight/fresh detection is free; a new one costs a token
+    # (raises RateLimited when over budget)
+    camera = await get_cam_num(hls_url)
+    _, _, bounding_boxes = await FLIGHTS.do(
+        (hls_url, "detect"), _detect, hls_url, admit=lambda: RATE_LIMITS.acquire(camera)
+    )
     return json.dumps(bounding_boxes, indent=4)
 
 
@@ -173,163 +173,347 @@ def crop_image(frame, bounding_box):
     return cropped if cropped.size > 0 else None
 
 
-async def classify_cropped_image(cropped_image):
-    if cropped_image is None:
-        return {"error": "Invalid cropped image"}
+CLASSIFICATION_KEY = "Classification"
+CLASSIFY_IMGSZ = 224
 
-    cropped_image = cv2.cvtColor(cropped_image, cv2.COLOR_BGR2RGB)
 
-    resized = cv2.resize(cropped_image, (224, 224))
-    tensor = (
-        torch.from_numpy(resized).permute(2, 0, 1).float().unsqueeze(0) / 255.0
-    )
+def _max_batch_size() -> int:
+    cfg = get_section(CLASSIFICATION_KEY, {"max_batch_size": 32})
+    try:
+        return max(1, int(cfg["max_batch_size"]))
+    except (TypeError, ValueError):
+        return 32
+
+
+def _prepare_crop(cropped_image):
+    # BGR crop -> RGB 224x224 uint8
+    rgb = cv2.cvtColor(cropped_image, cv2.COLOR_BGR2RGB)
+    return cv2.resize(rgb, (CLASSIFY_IMGSZ, CLASSIFY_IMGSZ))
+
+
+def _top1_labels(model, results, count):
+    if not results:
+        return ["Unknown"] * count
+    return [model.names[r.probs.top1].replace("_", " ") for r in results]
+
+
+def classify_crop_batch(cropped_images):
+    """
+    Classifies many crops with one predict() call per model per batch.
+    Returns a list aligned with `cropped_images`; invalid crops get
+    {"error": ...} just like classify_cropped_image.
+    """
+    classifications = [{"error": "Invalid cropped image"} for _ in cropped_images]
+
+    valid_idx = [i for i, c in enumerate(cropped_images) if c is not None and c.size > 0]
+    if not valid_idx:
+        return classifications
 
     MODELS.ensure_loaded()
+    # Hold on to these instances for the whole batch, even if a reload swaps them;
+    # taken together with their versions so results are cached under the right ones
+    snapshot = MODELS.snapshot(CLASSIFIERS)
+    disease_model, disease_conf, _ = snapshot["Disease"]
+    growth_model, growth_conf, _ = snapshot["Growth"]
+    health_model, health_conf, _ = snapshot["Health"]
+    versions = CLASSIFICATION_CACHE.model_versions(snapshot)
+    max_batch = _max_batch_size()
+
+    # Near-identical crops were already classified by these model versions
+    prepared = {i: _prepare_crop(cropped_images[i]) for i in valid_idx}
+    hashes = {i: dhash(prepared[i]) for i in valid_idx}
+    misses = []
+    for i in valid_idx:
+        cached = CLASSIFICATION_CACHE.get(hashes[i], versions)
+        if cached is None:
+            misses.append(i)
+        else:
+            classifications[i] = cached
+    valid_idx = misses
+
+    for start in range(0, len(valid_idx), max_batch):
+        chunk = valid_idx[start:start + max_batch]
+
+        stacked = np.stack([prepared[i] for i in chunk])
+        tensor = torch.from_numpy(stacked).permute(0, 3, 1, 2).float() / 255.0
+
+        disease_result = disease_model.predict(
+            source=tensor,
+            imgsz=CLASSIFY_IMGSZ,
+            device=device,
+            conf=disease_conf,
+            verbose=False,
+        )
+        growth_result = growth_model.predict(
+            source=tensor,
+            imgsz=CLASSIFY_IMGSZ,
+            device=device,
+            conf=growth_conf,
+            verbose=False,
+        )
+        health_result = health_model.predict(
+            source=tensor,
+            imgsz=CLASSIFY_IMGSZ,
+            device=device,
+            conf=health_conf,
+            verbose=False,
+        )
+
+        diseases = _top1_labels(disease_model, disease_result, len(chunk))
+        growths = _top1_labels(growth_model, growth_result, len(chunk))
+        healths = _top1_labels(health_model, health_result, len(chunk))
+
+        for j, i in enumerate(chunk):
+            classifications[i] = {
+                "disease": diseases[j],
+                "growth": growths[j],
+                "health": healths[j],
+            }
+            CLASSIFICATION_CACHE.put(hashes[i], versions, classifications[i])
 
-    disease_result = MODELS.disease_model.predict(
-        source=tensor,
-        imgsz=224,
-        device=device,
-        conf=MODELS.disease_conf,
-        verbose=False,
-    )
-    growth_result = MODELS.growth_model.predict(
-        source=tensor,
-        imgsz=224,
-        device=device,
-        conf=MODELS.growth_conf,
-        verbose=False,
-    )
-    health_result = MODELS.health_model.predict(
-        source=tensor,
-        imgsz=224,
-        device=device,
-        conf=MODELS.health_conf,
-        verbose=False,
-    )
+    return classifications
 
-    classification = {
-        "disease": (
-            MODELS.disease_model.names[disease_result[0].probs.top1]
-            if disease_result
-            else "Unknown"
-        ).replace("_", " "),
-        "growth": (
-            MODELS.growth_model.names[growth_result[0].probs.top1]
-            if growth_result
-            else "Unknown"
-        ).replace("_", " "),
-        "health": (
-            MODELS.health_model.names[health_result[0].probs.top1]
-            if health_result
-            else "Unknown"
-        ).replace("_", " "),
-    }
 
-    return classification
+async def classify_cropped_images(cropped_images):
+    return await INFERENCE.run(classify_crop_batch, cropped_images)
+
+
+async def classify_cropped_image(cropped_image):
+    if cropped_image is None:
+        return {"error": "Invalid cropped image"}
+
+    return (await classify_cropped_images([cropped_image]))[0]
 
 
 # Function to encode an image to Base64 string for transmission
 def encode_image_to_base64(image):
-    _, buffer = cv2.imencode(".jpg", image)
-    jpg_as_text = base64.b64encode(buffer).decode("utf-8")
-    return jpg_as_text
+    # Accepts a BGR array or an EncodedCrop (reuses its JPEG bytes)
+    return as_encoded(image).base64
 
 
-# Updated WebSocket server handler
-async def handler(websoc):
-    try:
-        async for message in websoc:
-            data = json.loads(message)
-            hls_url = data.get("url")
+async def _classify_boxes(frame, bounding_boxes, hls_url):
+    """
+    Crops every box from `frame`, classifies them in one batch, logs/saves
+    each result and returns the websocket result entries.
+    """
+    results = []
+
+    # ✅ Improvement: compute cam_num once
+    cam_num = await get_cam_num(hls_url)
+
+    # Keep every crop paired with its box so the tracker sees the same plants
+    pairs = [(box, crop_image(frame, box)) for box in bounding_boxes]
+    pairs = [(box, c) for box, c in pairs if c is not None]  # Skip if crop failed
+    crops = [c for _, c in pairs]
+    tracks = TRACKERS.assign(cam_num, [box for box, _ in pairs])
+
+    # Only new, changed or stale plants go through the classifiers
+    classifications = [TRACKERS.cached(track, c) for track, c in zip(tracks, crops)]
+    pending = [i for i, c in enumerate(classifications) if c is None]
+    if pending:
+        fresh = await classify_cropped_images([crops[i] for i in pending])
+        for i, classification in zip(pending, fresh):
+            TRACKERS.remember(tracks[i], crops[i], classification)
+            classifications[i] = classification
+    image_folder = MODELS.image_folder
+
+    for cropped, track, classification in zip(crops, tracks, classifications):
+        print("Classification results:", classification)
+        classification = {'disease': 'healthy', 'growth': 'harvest stage', 'health': 'fully_nutritional'}###############################
+
+        # If classification contains "error", skip sending that result
+        if "error" in classification:
+            continue
+
+        # Stable across cycles for as long as the plant keeps being detected
+        plant_id = track.track_id
+
+        # Compress once; disk, email and websocket all share these JPEG bytes
+        encoded = EncodedCrop(cropped)
+
+        # ✅ Improvement: protect Excel logging (won't break websocket if it fails)
+        try:
+            disease_label = str(classification.get("disease", "unknown"))
+            health_label  = str(classification.get("health", "unknown"))
+            disease_status = ClassificationMapper.get_disease_status(disease_label)        # 0/1/None
+            health_status  = ClassificationMapper.get_health_status_binary(health_label)   # 1/0/None
+            if _is_alert_time(now):
+
+                append_agrivision_row(
+                    camera_number=str(cam_num),
+                    plant_id=plant_id,
+                    growth=str(classification.get("growth", "Unknown")),
+                    health=health_label,
+                    disease=disease_label,
+                    disease_status = disease_status,          
+                    health_status = health_status,     
+                )
+
+                if disease_status == 1:
+                    try:
+                        # run blocking smtp in a worker thread so websocket doesn't lag
+                        await asyncio.to_thread(
+                            send_disease_alert_email,
+                            camera_number=str(cam_num),
+                            plant_id=plant_id,
+                            classification=classification,
+                            image_jpeg=encoded.jpeg,  # same bytes as disk + websocket
+                        )
+                    except Exception as e:
+                        print(f"[ALERT] Failed to send email: {e}")
+
+
+        except Exception as e:
+            print(f"Excel logging failed: {e}")
 
-            # Check if the request is detection-only (Step 1) or includes bounding boxes (Step 2)
-            if "bounding_boxes" not in data:
-                # Detection-only request
-                bounding_boxes_json = await yolo_detection(hls_url)
-                print("Detection completed")
-                await websoc.send(bounding_boxes_json)
+        save_frame_locally(
+                encoded,
+                cam_num,
+                classification,
+                base_dir=image_folder,
+        )
 
-            else:
-                # Cropping & Classification request
-                bounding_boxes = data.get("bounding_boxes")
-                frame = await capture_frame_from_hls(hls_url)
-                results = []
+        # Kept as EncodedCrop: JSON clients get base64, binary clients raw JPEG bytes
+        result_entry = {
+            "cropped_image": encoded,
+            "classification": classification,
+            "plant_id": plant_id,
+        }
+        results.append(result_entry)
 
-                # ✅ Improvement: compute cam_num once
-                cam_num = await get_cam_num(hls_url)
+    return results
 
-                for box in bounding_boxes:
-                    cropped = crop_image(frame, box)
-                    if cropped is None:
-                        continue  # Skip if crop failed
 
-                    classification = await classify_cropped_image(cropped)
+async def run_camera_cycle(hls_url):
+    """
+    Full detect -> crop -> classify pass for one camera.
+    Returns the `detect_classify` response payload.
+    """
+    frame, frame_id, bounding_boxes = await _detect(hls_url)
+    results = await _classify_boxes(frame, bounding_boxes, hls_url)
+    return {
+        "type": "detect_classify",
+        "camera": await get_cam_num(hls_url),
+        "frame_id": frame_id,
+        "bounding_boxes": bounding_boxes,
+        "results": results,
+    }
 
-                    print("Classification results:", classification)
-                    classification = {'disease': 'healthy', 'growth': 'harvest stage', 'health': 'fully_nutritional'}###############################
 
-                    # If classification contains "error", skip sending that result
-                    if "error" in classification:
-                        continue
+async def _cycle_and_publish(hls_url):
+    response = await run_camera_cycle(hls_url)
+    RESULTS.publish(response["camera"], response)
+    return response
 
-                    plant_id = f"{cam_num}-{len(results)+1}"
 
-                    # ✅ Improvement: protect Excel logging (won't break websocket if it fails)
-                    try:
-                        disease_label = str(classification.get("disease", "unknown"))
-                        health_label  = str(classification.get("health", "unknown"))
-                        disease_status = ClassificationMapper.get_disease_status(disease_label)        # 0/1/None
-                        health_status  = ClassificationMapper.get_health_status_binary(health_label)   # 1/0/None
-                        if _is_alert_time(now):
-
-                            append_agrivision_row(
-                                camera_number=str(cam_num),
-                                plant_id=plant_id,
-                                growth=str(classification.get("growth", "Unknown")),
-                                health=health_label,
-                                disease=disease_label,
-                                disease_status = disease_status,          
-                                health_status = health_status,     
-                            )
-                            
-                            if disease_status == 1:
-                                try:
-                                    # run blocking smtp in a worker thread so websocket doesn't lag
-                                    await asyncio.to_thread(
-                                        send_disease_alert_email,
-                                        camera_number=str(cam_num),
-                                        plant_id=plant_id,
-                                        classification=classification,
-                                        image_bgr=cropped,  # cropped is BGR already
-                                    )
-                                except Exception as e:
-                                    print(f"[ALERT] Failed to send email: {e}")
+async def camera_cycle(hls_url, admit=None):
+    """
+    run_camera_cycle shared between concurrent callers (clients and the
+    scheduler); the result is published once per actual cycle.
+    `admit` is only consulted when a new cycle has to start.
+    """
+    return await FLIGHTS.do(
+        (hls_url, "detect_classify"), _cycle_and_publish, hls_url, admit=admit
+    )
 
 
-                    except Exception as e:
-                        print(f"Excel logging failed: {e}")
+async def _handle_message(websoc, data, protocol):
+    hls_url = data.get("url")
+
+    # Single round trip: detection + cropping + classification in one pass
+    if data.get("type") == "detect_classify":
+        camera = await get_cam_num(hls_url)
+        try:
+            response = await camera_cycle(hls_url, admit=lambda: RATE_LIMITS.acquire(camera))
+        except RateLimited as e:
+            latest = RESULTS.latest(camera)
+            if latest is None or not RATE_LIMITS.settings().get("serve_cached"):
+                raise
+            # Over budget: answer with the last published cycle instead
+            await websoc.send(
+                protocol.encode(dict(latest, cached=True, retry_after=round(e.retry_after, 2)))
+            )
+            return
+
+        print("Detection and classification completed")
+        await websoc.send(protocol.encode(response))
+
+    # Check if the request is detection-only (Step 1) or includes bounding boxes (Step 2)
+    elif "bounding_boxes" not in data:
+        # Detection-only request (no crops, so always a JSON text frame)
+        bounding_boxes_json = await yolo_detection(hls_url)
+        print("Detection completed")
+        await websoc.send(bounding_boxes_json)
 
-                    MODELS.ensure_loaded()
+    else:
+        # Cropping & Classification request
+        bounding_boxes = data.get("bounding_boxes")
 
-                    save_frame_locally(
-                            cropped,
-                            cam_num,
-                            classification,
-                            base_dir=MODELS.image_folder,
-                    )
+        # Reuse the frame detection ran on when the client sends its frame_id
+        frame_id = data.get("frame_id")
+        if frame_id is None and bounding_boxes:
+            frame_id = bounding_boxes[0].get("frame_id")
+        frame = FRAMES.get(frame_id, hls_url)
+        if frame is None:
+            frame = await capture_frame_from_hls(hls_url)
+        results = await _classify_boxes(frame, bounding_boxes, hls_url)
 
-                    encoded_image = encode_image_to_base64(cropped)
+        # Send empty array if no valid classification results
+        response = protocol.encode(results if results else [], indent=4)
+        await websoc.send(response)
 
-                    result_entry = {
-                        "cropped_image": encoded_image,
-                        "classification": classification,
-                    }
-                    results.append(result_entry)
 
-                # Send empty array if no valid classification results
-                response = json.dumps(results if results else [], indent=4)
-                await websoc.send(response)
+async def _handle_subscription(websoc, subscriber, data):
+    """
+    {"type": "subscribe", "url": ".../camera1.m3u8"} or {"type": "subscribe", "camera": "camera1"}
+    Subscribed clients receive every published detect_classify result for that camera.
+    """
+    hls_url = data.get("url")
+    camera = data.get("camera") or (await get_cam_num(hls_url) if hls_url else None)
+    if not camera:
+        await websoc.send(json.dumps({"error": "subscribe needs 'camera' or 'url'"}))
+        return
+
+    if data.get("type") == "subscribe":
+        RESULTS.subscribe(subscriber, camera, hls_url)
+        reply = {"type": "subscribed", "camera": camera}
+    else:
+        RESULTS.unsubscribe(subscriber, camera)
+        reply = {"type": "unsubscribed", "camera": camera}
+
+    await websoc.send(json.dumps(reply))
+
+
+# Updated WebSocket server handler
+async def handler(websoc):
+    subscriber = None
+    protocol = Protocol()
+    try:
+        async for message in websoc:
+            data = json.loads(message)
+
+            if data.get("type") == "hello":
+                # Negotiate the wire format for this connection
+                await websoc.send(json.dumps(protocol.negotiate(data)))
+                continue
+
+            if data.get("type") in ("subscribe", "unsubscribe"):
+                if subscriber is None:
+                    subscriber = RESULTS.new_subscriber(websoc, protocol)
+                await _handle_subscription(websoc, subscriber, data)
+                continue
+
+            try:
+                await _handle_message(websoc, data, protocol)
+            except InferenceQueueFull as e:
+                # Server is saturated: tell this client to back off, keep the connection
+                await websoc.send(json.dumps({"error": str(e), "busy": True}))
+            except RateLimited as e:
+                await websoc.send(json.dumps({
+                    "error": str(e),
+                    "busy": True,
+                    "retry_after": round(e.retry_after, 2),
+                }))
 
     except json.JSONDecodeError as e:
         error_message = {"error": f"JSON decode error: {str(e)}"}
@@ -337,3 +521,6 @@ async def handler(websoc):
     except Exception as e:
         error_message = {"error": str(e)}
         await websoc.send(json.dumps(error_message))
+    finally:
+        if subscriber is not None:
+            RESULTS.drop_subscriber(subscriber)
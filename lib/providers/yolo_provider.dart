@@ -34,7 +34,10 @@ class YOLOProvider with ChangeNotifier {
       print("WebSocket message received: $event");
       try {
         final data = jsonDecode(event);
-        if (data is List && data.isNotEmpty) {
+        if (data is Map && data['type'] == 'detect_classify') {
+          print("Combined detection/classification data detected");
+          _handleDetectClassifyResponse(Map<String, dynamic>.from(data));
+        } else if (data is List && data.isNotEmpty) {
           if (data[0].containsKey("classification")) {
             print("Classification data detected");
             _handleClassificationResponse(data);
@@ -95,8 +98,8 @@ class YOLOProvider with ChangeNotifier {
     try {
       _boundingBoxes.clear();
 
-      print("Sending detection request for: $url");
-      _channel.sink.add(jsonEncode({'url': url}));
+      print("Sending detect_classify request for: $url");
+      _channel.sink.add(jsonEncode({'type': 'detect_classify', 'url': url}));
     } catch (e) {
       debugPrint("Error sending detection request: $e");
       _handleProcessingError();
@@ -130,6 +133,17 @@ class YOLOProvider with ChangeNotifier {
     _sendCroppingRequest();
   }
 
+  void _handleDetectClassifyResponse(Map<String, dynamic> data) {
+    final boxes = (data['bounding_boxes'] as List?) ?? [];
+    final results = (data['results'] as List?) ?? [];
+    print(
+        "Handling detect_classify response with ${boxes.length} boxes, ${results.length} results");
+    _boundingBoxes = List<Map<String, dynamic>>.from(boxes);
+    _classificationResults = List<Map<String, dynamic>>.from(results);
+    notifyListeners();
+    _handleProcessingComplete();
+  }
+
   void _handleClassificationResponse(List<dynamic> data) {
     print("Handling classification response with ${data.length} items");
     _classificationResults = List<Map<String, dynamic>>.from(data);